@@ -0,0 +1,237 @@
+"""Benchmarks for parsing, writing, column access and export of epw files.
+
+Usage:
+    python benchmarks/bench_epw.py [--cases NAME ...] [--repeat N] [--output FILE]
+    python benchmarks/bench_epw.py --compare BASELINE.json CURRENT.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+
+from weather import EPW
+
+BENCHMARKS_DIRECTORY = Path(__file__).parent
+TEST_EPW_FILE = BENCHMARKS_DIRECTORY.parent / "tests" / "data" / "test_epw.epw"
+
+# name: (number of years, number of records per hour)
+CASES: dict[str, tuple[int, int]] = {
+    "1y_hourly": (1, 1),
+    "30y_hourly": (30, 1),
+    "1y_15min": (1, 4),
+    "1y_5min": (1, 12),
+    "1y_1min": (1, 60),
+}
+ACCESSED_FIELDS = (
+    "dry_bulb_temperature",
+    "dew_point_temperature",
+    "relative_humidity",
+    "atmospheric_station_pressure",
+    "global_horizontal_radiation",
+    "direct_normal_radiation",
+    "diffuse_horizontal_radiation",
+    "wind_direction",
+    "wind_speed",
+    "total_sky_cover",
+    "opaque_sky_cover",
+    "liquid_precipitation_depth",
+)
+
+
+def make_epw(epw_file: Path, num_years: int, records_per_hour: int) -> None:
+    # headers of the test file, synthetic but plausible data records
+    header_lines = TEST_EPW_FILE.read_text().splitlines()[:8]
+    header_lines[7] = f"DATA PERIODS,1,{records_per_hour},Data,Sunday, 1/ 1,12/31"
+    rng = np.random.default_rng(0)
+
+    with open(epw_file, "w") as fp:
+        fp.write("\n".join(header_lines) + "\n")
+        for year in range(1991, 1991 + num_years):
+            starts = np.arange(  # of the record intervals
+                np.datetime64(f"{year}-01-01T00:00"),
+                np.datetime64(f"{year + 1}-01-01T00:00"),
+                np.timedelta64(60 // records_per_hour, "m"),
+            )
+            months = starts.astype("datetime64[M]").astype(int) % 12 + 1
+            days = (
+                starts.astype("datetime64[D]") - starts.astype("datetime64[M]")
+            ).astype(int) + 1
+            minutes_of_day = (starts - starts.astype("datetime64[D]")).astype(int)
+            no_leap_day = ~((months == 2) & (days == 29))  # as typical in epw
+            months, days, minutes_of_day = (
+                months[no_leap_day],
+                days[no_leap_day],
+                minutes_of_day[no_leap_day],
+            )
+            num_records = len(months)
+            hours = minutes_of_day // 60 + 1  # hour-ending
+            minutes = minutes_of_day % 60 + 60 // records_per_hour
+            dry_bulb = rng.normal(10, 8, num_records).round(1)
+            columns = (
+                np.full(num_records, year),
+                months,
+                days,
+                hours,
+                minutes,
+                np.full(num_records, "C9C9C9C9*0?9?9?9?9?9?9?9A7A7A7A7A7A7*0E8*0*0"),
+                dry_bulb,
+                (dry_bulb - rng.uniform(0, 5, num_records)).round(1),
+                rng.integers(30, 100, num_records),
+                rng.integers(98000, 103000, num_records),
+                *(rng.integers(0, 1400, num_records) for _ in range(10)),
+                rng.integers(0, 360, num_records),
+                rng.uniform(0, 15, num_records).round(1),
+                rng.integers(0, 10, num_records),
+                rng.integers(0, 10, num_records),
+                rng.uniform(0, 50, num_records).round(1),
+                rng.integers(0, 99999, num_records),
+                np.full(num_records, 9),
+                np.full(num_records, "999999999"),
+                np.zeros(num_records, dtype=int),
+                np.full(num_records, "0.0400"),
+                np.zeros(num_records, dtype=int),
+                np.full(num_records, 88),
+                np.full(num_records, "0.000"),
+                rng.uniform(0, 2, num_records).round(1),
+                np.full(num_records, "0.0"),
+            )
+            fp.write(
+                "\n".join(
+                    map(",".join, zip(*(column.astype(str) for column in columns)))
+                )
+                + "\n"
+            )
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict[str, float]:
+    # best-of wall time, and peak traced memory of one extra run
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds": min(timings),
+        "mean_seconds": sum(timings) / len(timings),
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def run_case(case_name: str, work_dir: Path, repeat: int) -> dict[str, dict]:
+    epw_file = work_dir / f"{case_name}.epw"
+    make_epw(epw_file, *CASES[case_name])
+    epw = EPW.from_epw(epw_file)
+    out_file = work_dir / f"{case_name}_out.epw"
+
+    benchmarks: dict[str, Callable[[], object]] = {
+        "from_epw[c]": lambda: EPW.from_epw(epw_file, engine="c"),
+        "from_epw[python]": lambda: EPW.from_epw(epw_file, engine="python"),
+        "to_epw": lambda: epw.to_epw(out_file),
+        "column_access": lambda: [
+            getattr(epw, field_name) for field_name in ACCESSED_FIELDS
+        ],
+        "to_pandas": lambda: epw.records.to_pandas(),
+        "roundtrip": lambda: (
+            epw.to_epw(out_file),
+            EPW.from_epw(out_file),
+        ),
+    }
+    results = {
+        "num_records": len(epw.records),
+        "file_bytes": epw_file.stat().st_size,
+    }
+    for benchmark_name, func in benchmarks.items():
+        results[benchmark_name] = measure(func, repeat)
+        print(
+            f"{case_name:>12} {benchmark_name:>18} "
+            f"{results[benchmark_name]['seconds'] * 1e3:10.2f} ms "
+            f"{results[benchmark_name]['peak_memory_bytes'] / 2**20:10.2f} MiB",
+            file=sys.stderr,
+        )
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ("git", "rev-parse", "HEAD"),
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=BENCHMARKS_DIRECTORY,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline_file: Path, current_file: Path, threshold: float) -> int:
+    # prints time ratios, exits non-zero if any benchmark regressed past threshold
+    baseline = json.loads(baseline_file.read_text())["cases"]
+    current = json.loads(current_file.read_text())["cases"]
+    regressed = False
+    for case_name in baseline.keys() & current.keys():
+        for benchmark_name, result in current[case_name].items():
+            if not isinstance(result, dict) or (
+                benchmark_name not in baseline[case_name]
+            ):
+                continue
+            ratio = result["seconds"] / baseline[case_name][benchmark_name]["seconds"]
+            flag = " <- regression" if ratio > threshold else ""
+            regressed |= bool(flag)
+            print(f"{case_name:>12} {benchmark_name:>18} {ratio:8.2f}x{flag}")
+    return int(regressed)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=tuple(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    parser.add_argument(
+        "--compare", nargs=2, type=Path, metavar=("BASELINE", "CURRENT")
+    )
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        cases = {
+            case_name: run_case(case_name, Path(work_dir), args.repeat)
+            for case_name in args.cases
+        }
+    args.output.write_text(
+        json.dumps(
+            {
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "numpy": np.__version__,
+                "repeat": args.repeat,
+                "cases": cases,
+            },
+            indent=2,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,26 @@
+import asyncio
+import gzip
+import importlib.util
+import json
+import logging
+import pickle
+import subprocess
+import sys
+import threading
+import tracemalloc
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import pytest
 
-from weather import EPW
+from weather import EPW, EPWCache, EPWCollection, EPWProfiler
+from weather._cli import main
+from weather._solar import _SOLAR_CACHE
+from weather._tools import rectable
 
 WEATHER_TESTS_DIRECTORY = Path(__file__).parent
 WEATHER_TESTS_DATA = WEATHER_TESTS_DIRECTORY / "data"
@@ -196,4 +213,1286 @@ def test_data_fields(epw):
         if field_type is float:
             assert getattr(epw, field_name) == pytest.approx(expected_var)
         else:
-            assert getattr(epw, field_name) == expected_var
+            assert tuple(getattr(epw, field_name)) == expected_var
+
+
+def test_data_columns(epw):
+    for field_name, field_type in epw.fields.items():
+        column = getattr(epw, field_name)
+        assert isinstance(column, np.ndarray)
+        assert column is epw.records[field_name]  # no transpose on access
+        assert not column.flags.writeable
+        assert len(column) == len(epw.records) == 8760
+        if field_type is not str:
+            assert column.dtype == np.dtype(field_type)
+
+
+def test_data_rows(epw):
+    first_row = epw.records[0]
+    assert first_row == next(iter(epw.records))
+    assert first_row[:5] == (1991, 1, 1, 1, 60)
+    assert tuple(map(type, first_row)) == tuple(epw.fields.values())
+    week = epw.records[:168]
+    assert len(week) == 168
+    assert np.shares_memory(week["dry_bulb_temperature"], epw.dry_bulb_temperature)
+
+
+@pytest.fixture
+def bad_epw_file(tmp_path):
+    epw_lines = (WEATHER_TESTS_DATA / "test_epw.epw").read_text().splitlines()
+    bad_epw_file = tmp_path / "bad_epw.epw"
+    bad_epw_file.write_text(
+        "\n".join(
+            epw_lines[:8]
+            + [epw_lines[8].rsplit(",", 3)[0]]  # short row
+            + [epw_lines[9].replace(",1.2,", ",,")]  # empty float
+            + epw_lines[10:12]
+        )
+        + "\n"
+    )
+    return bad_epw_file
+
+
+@pytest.mark.parametrize("engine", ("c", "python"))
+def test_engines(epw, engine):
+    engine_epw = EPW.from_epw(WEATHER_TESTS_DATA / "test_epw.epw", engine=engine)
+    for field_name in epw.fields.keys():
+        np.testing.assert_array_equal(
+            getattr(engine_epw, field_name), getattr(epw, field_name)
+        )
+
+
+@pytest.mark.parametrize("engine", ("c", "python"))
+def test_engines_bad_epw(bad_epw_file, engine):
+    bad_epw = EPW.from_epw(bad_epw_file, engine=engine)
+    assert len(bad_epw.records) == 4
+    assert np.isnan(bad_epw.albedo[0])
+    assert np.isnan(bad_epw.liquid_precipitation_quantity[0])
+    assert np.isnan(bad_epw.dry_bulb_temperature[1])
+    assert bad_epw.present_weather_codes[0] == "999999999"
+
+
+@pytest.fixture
+def short_epw_file(tmp_path):
+    epw_lines = (WEATHER_TESTS_DATA / "test_epw.epw").read_text().splitlines()
+    short_epw_file = tmp_path / "short_epw.epw"
+    short_epw_file.write_text(
+        "\n".join(
+            epw_lines[:8]
+            + [epw_line.rsplit(",", 2)[0] for epw_line in epw_lines[8:]]  # to albedo
+        )
+        + "\n"
+    )
+    return short_epw_file
+
+
+@pytest.mark.parametrize("engine", ("c", "python"))
+def test_engines_short_epw(epw, short_epw_file, engine, capsys):
+    short_epw = EPW.from_epw(short_epw_file, engine=engine)
+    assert len(short_epw.records) == 8760
+    np.testing.assert_array_equal(short_epw.albedo, epw.albedo)
+    assert np.isnan(short_epw.liquid_precipitation_depth).all()
+    assert np.isnan(short_epw.liquid_precipitation_quantity).all()
+    chunks = tuple(EPW.iter_records(short_epw_file, chunksize=1000, engine=engine))
+    assert sum(map(len, chunks)) == 8760
+    assert np.isnan(chunks[-1]["liquid_precipitation_quantity"]).all()
+    assert main(["validate", str(short_epw_file), "-j", "1"]) == 0
+    assert capsys.readouterr().out.startswith(f"{short_epw_file}: ok, 8760 records")
+    short_lines = short_epw_file.read_text().splitlines()
+    short_epw_file.write_text("\n".join(short_lines[:9]) + "\n")  # a single row
+    single_epw = EPW.from_epw(short_epw_file, engine=engine)
+    assert len(single_epw.records) == 1
+    assert np.isnan(single_epw.liquid_precipitation_quantity[0])
+
+
+@pytest.mark.parametrize("engine", ("c", "python"))
+def test_engines_quotes(tmp_path, engine):
+    epw_lines = (WEATHER_TESTS_DATA / "test_epw.epw").read_text().splitlines()
+    quoted_epw_file = tmp_path / "quoted_epw.epw"
+    quoted_epw_file.write_text(
+        "\n".join(
+            epw_lines[:9] + [epw_lines[9].replace(",999999999,", ',"999999999",')]
+        )
+        + "\n"
+    )
+    quoted_epw = EPW.from_epw(quoted_epw_file, engine=engine)
+    assert quoted_epw.present_weather_codes[1] == '"999999999"'
+
+
+@pytest.mark.parametrize("engine", ["c", "python"])
+def test_workers(engine, bad_epw_file, tmp_path, monkeypatch):
+    epw_lines = (WEATHER_TESTS_DATA / "test_epw.epw").read_text().splitlines()
+    short_epw_file = tmp_path / "short_epw.epw"
+    short_epw_file.write_text(
+        "\n".join(
+            epw_lines[:1008]
+            + [epw_line.rsplit(",", 2)[0] for epw_line in epw_lines[1008:]]
+        )
+        + "\n"
+    )
+    for epw_file, chunk_size, workers in (
+        (WEATHER_TESTS_DATA / "test_epw.epw", 100, 3),
+        (bad_epw_file, 100, 3),
+        (short_epw_file, 2**16, 2),  # whole chunks of short rows
+    ):
+        monkeypatch.setattr("weather.epw._PARALLEL_CHUNK_SIZE", chunk_size)
+        serial_epw = EPW.from_epw(epw_file, engine=engine)
+        parallel_epw = EPW.from_epw(epw_file, engine=engine, workers=workers)
+        assert parallel_epw.location.city == serial_epw.location.city
+        assert parallel_epw.records.field_names == serial_epw.records.field_names
+        for field_name in serial_epw.fields:
+            np.testing.assert_array_equal(
+                parallel_epw.records[field_name], serial_epw.records[field_name]
+            )
+            assert (
+                parallel_epw.records[field_name].dtype
+                == serial_epw.records[field_name].dtype
+            )
+    with pytest.raises(ValueError, match="invalid workers"):
+        EPW.from_epw(bad_epw_file, workers=0)
+
+
+def test_engines_invalid():
+    with pytest.raises(ValueError, match="invalid engine"):
+        EPW.from_epw(WEATHER_TESTS_DATA / "test_epw.epw", engine="rust")
+
+
+@pytest.mark.parametrize("engine", ["c", "python"])
+def test_profiler(engine, bad_epw_file, caplog):
+    events = []
+    with (
+        caplog.at_level(logging.DEBUG, logger="weather.test"),
+        EPWProfiler(
+            lambda *event: events.append(event),
+            logger=logging.getLogger("weather.test"),
+            trace_memory=True,
+        ) as profiler,
+    ):
+        EPW.from_epw(WEATHER_TESTS_DATA / "test_epw.epw", engine=engine)
+        bad_epw = EPW.from_epw(bad_epw_file, engine=engine, columns=("year",))
+    EPW.from_epw(bad_epw_file, engine=engine)  # not profiled
+
+    assert profiler.timings["read_headers"][0] == 2
+    assert profiler.timings[f"read_records[{engine}]"][0] == 2
+    assert profiler.peak_memory[f"read_records[{engine}]"] > 0
+    assert profiler.counters["files"] == 2
+    assert profiler.counters["bytes_read"] == (
+        (WEATHER_TESTS_DATA / "test_epw.epw").stat().st_size
+        + bad_epw_file.stat().st_size
+    )
+    assert profiler.counters["rows"] == 8760 + len(bad_epw.records)
+    assert profiler.counters["cells"] == 8760 * len(EPW.fields) + len(bad_epw.records)
+    if engine == "python":
+        assert profiler.counters["padded_rows"] == 1
+    assert len(events) == len(caplog.records)
+    assert ("count", "files", 1) in events
+
+
+def test_startup_imports():
+    # in a fresh interpreter, as pandas and asyncio are only imported on demand
+    startup = subprocess.run(
+        (
+            sys.executable,
+            "-c",
+            "import sys\n"
+            "import weather\n"
+            "from weather._tools import rectuple\n"
+            "print('pandas' in sys.modules, 'asyncio' in sys.modules)\n"
+            "weather.EPW.read_header(sys.argv[1])\n"
+            "num_types = rectuple.cache_info().currsize\n"
+            "weather.EPW.read_header(sys.argv[1])\n"
+            "print('pandas' in sys.modules, rectuple.cache_info().currsize == num_types)\n"
+            "weather.EPW.from_epw(sys.argv[1])\n"
+            "print('pandas' in sys.modules)",
+            str(WEATHER_TESTS_DATA / "test_epw.epw"),
+        ),
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=WEATHER_TESTS_DIRECTORY.parent,
+    )
+    assert startup.stdout.split() == [
+        "False",  # pandas, on import
+        "False",  # asyncio, on import
+        "False",  # pandas, for the headers only
+        "True",  # the cached rectuple types, on the second load
+        "True",  # pandas, for the c engine
+    ]
+
+
+def test_read_header(epw):
+    headers = EPW.read_header(WEATHER_TESTS_DATA / "test_epw.epw")
+    assert tuple(headers.keys()) == tuple(epw.metafields.keys())
+    assert headers["location"].city == epw.location.city
+    assert headers["data_periods"].number_of_records_per_hour == 1
+    assert headers["ground_temperatures"].depth == epw.ground_temperatures.depth
+    assert type(headers["ground_temperatures"].records) is type(
+        epw.ground_temperatures.records
+    )  # one rectuple type, not one per load
+
+
+@pytest.mark.parametrize("engine", ("c", "python"))
+def test_iter_records(epw, engine):
+    chunks = tuple(
+        EPW.iter_records(
+            WEATHER_TESTS_DATA / "test_epw.epw", chunksize=1000, engine=engine
+        )
+    )
+    assert tuple(map(len, chunks)) == (1000,) * 8 + (760,)
+    for field_name in epw.fields.keys():
+        np.testing.assert_array_equal(
+            np.concatenate(tuple(chunk[field_name] for chunk in chunks)),
+            getattr(epw, field_name),
+        )
+
+
+def test_pickle(epw):
+    unpickled_epw = pickle.loads(pickle.dumps(epw))
+    assert unpickled_epw.location.city == epw.location.city
+    assert unpickled_epw.typical_extreme_periods.records == (
+        epw.typical_extreme_periods.records
+    )
+    assert not unpickled_epw.dry_bulb_temperature.flags.writeable
+    np.testing.assert_array_equal(
+        unpickled_epw.dry_bulb_temperature, epw.dry_bulb_temperature
+    )
+
+
+@pytest.mark.parametrize("ordered", (True, False))
+def test_from_epw_many(epw, tmp_path, ordered):
+    epw_files = (
+        WEATHER_TESTS_DATA / "test_epw.epw",
+        tmp_path / "missing.epw",
+        WEATHER_TESTS_DATA / "test_epw.epw",
+    )
+    results = tuple(
+        EPW.from_epw_many(epw_files, max_workers=2, chunksize=2, ordered=ordered)
+    )
+    if ordered:
+        assert tuple(epw_file for epw_file, _ in results) == epw_files
+    assert sorted(type(result).__name__ for _, result in results) == [
+        "EPW",
+        "EPW",
+        "FileNotFoundError",
+    ]
+    for _, result in results:
+        if isinstance(result, EPW):
+            np.testing.assert_array_equal(
+                result.dry_bulb_temperature, epw.dry_bulb_temperature
+            )
+
+    # invalid arguments fail on call, not on iteration
+    for kwargs, match in (
+        ({"max_workers": 0}, "invalid max_workers"),
+        ({"chunksize": 0}, "invalid chunksize"),
+        ({"engine": "rust"}, "invalid engine"),
+        ({"columns": ("wind_chill",)}, "wind_chill"),
+    ):
+        with pytest.raises(ValueError, match=match):
+            EPW.from_epw_many(epw_files, **kwargs)
+
+
+def test_async(epw, tmp_path):
+    async def load_and_save():
+        semaphore = asyncio.Semaphore(1)
+        epws = await asyncio.gather(
+            *(
+                EPW.afrom_epw(
+                    WEATHER_TESTS_DATA / "test_epw.epw",
+                    engine=engine,
+                    semaphore=semaphore,
+                )
+                for engine in ("c", "python")
+            )
+        )
+        await epws[0].ato_epw(tmp_path / "async.epw")
+        return epws
+
+    for async_epw in asyncio.run(load_and_save()):
+        np.testing.assert_array_equal(
+            async_epw.dry_bulb_temperature, epw.dry_bulb_temperature
+        )
+    assert [path.name for path in tmp_path.iterdir()] == ["async.epw"]
+    epw.to_epw(tmp_path / "sync.epw")
+    assert (tmp_path / "async.epw").read_bytes() == (tmp_path / "sync.epw").read_bytes()
+
+
+def test_async_cancel(epw, tmp_path):
+    async def cancel_save():
+        gate = threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            loop = asyncio.get_running_loop()
+            blocked = loop.run_in_executor(executor, gate.wait)
+            task = asyncio.create_task(
+                epw.ato_epw(tmp_path / "test_epw.epw", executor=executor)
+            )
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            gate.set()
+            await blocked
+            await loop.run_in_executor(executor, lambda: None)  # after the write
+            await asyncio.sleep(0.01)
+
+    asyncio.run(cancel_save())
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cache(epw, tmp_path):
+    cache = EPWCache(tmp_path / "cache")
+    epw_file = tmp_path / "test_epw.epw"
+    epw_file.write_bytes((WEATHER_TESTS_DATA / "test_epw.epw").read_bytes())
+
+    cached_epw = EPW.from_epw(epw_file, cache=cache)  # miss, writes the entry
+    assert len(tuple((tmp_path / "cache").iterdir())) == 1
+    reopened_epw = EPW.from_epw(epw_file, cache=cache)  # hit, memory-mapped
+    column_base = reopened_epw.dry_bulb_temperature
+    while not isinstance(column_base, np.memmap):
+        column_base = column_base.base
+    assert column_base.filename is not None
+    assert reopened_epw.location.city == cached_epw.location.city
+    assert reopened_epw.typical_extreme_periods.records == (
+        cached_epw.typical_extreme_periods.records
+    )
+    for field_name in epw.fields:
+        np.testing.assert_array_equal(
+            getattr(reopened_epw, field_name), getattr(epw, field_name)
+        )
+
+    epw_file.write_text(epw_file.read_text().replace("LONDON", "PARIS", 1))
+    assert EPW.from_epw(epw_file, cache=cache).location.city == "PARIS/GATWICK"
+
+
+def test_cache_eviction(tmp_path):
+    cache = EPWCache(tmp_path / "cache", max_bytes=0)
+    EPW.from_epw(WEATHER_TESTS_DATA / "test_epw.epw", cache=cache)
+    assert tuple((tmp_path / "cache").iterdir()) == ()
+
+
+@pytest.mark.parametrize("engine", ("c", "python"))
+def test_columns(epw, tmp_path, engine):
+    columns = ("relative_humidity", "dry_bulb_temperature", "present_weather_codes")
+    projected_epw = EPW.from_epw(
+        WEATHER_TESTS_DATA / "test_epw.epw", engine=engine, columns=columns
+    )
+    assert projected_epw.records.field_names == (
+        "dry_bulb_temperature",
+        "relative_humidity",
+        "present_weather_codes",
+    )
+    for field_name in columns:
+        np.testing.assert_array_equal(
+            getattr(projected_epw, field_name), getattr(epw, field_name)
+        )
+    with pytest.raises(AttributeError, match="not loaded"):
+        projected_epw.wind_speed
+    with pytest.raises(ValueError, match="unloaded columns"):
+        projected_epw.to_epw(tmp_path / "projected_epw.epw")
+
+    (chunk,) = EPW.iter_records(
+        WEATHER_TESTS_DATA / "test_epw.epw", engine=engine, columns=columns
+    )
+    assert chunk.field_names == projected_epw.records.field_names
+
+
+def test_columns_parsed(short_epw_file, monkeypatch):
+    parsed_columns = []
+    load_epw_records_df = EPW._load_epw_records_df.__func__
+
+    def _load_epw_records_df(cls, records_df, field_dtypes):
+        parsed_columns.append(dict(records_df.dtypes))
+        return load_epw_records_df(cls, records_df, field_dtypes)
+
+    monkeypatch.setattr(EPW, "_load_epw_records_df", classmethod(_load_epw_records_df))
+    EPW.from_epw(WEATHER_TESTS_DATA / "test_epw.epw", columns=("dry_bulb_temperature",))
+    assert parsed_columns.pop() == {"dry_bulb_temperature": np.float64}
+    short_epw = EPW.from_epw(short_epw_file, columns=("liquid_precipitation_depth",))
+    assert len(parsed_columns.pop()) == len(EPW.fields)  # padded, at full width
+    assert np.isnan(short_epw.liquid_precipitation_depth).all()
+
+    def peak_memory(columns):
+        tracemalloc.start()
+        try:
+            EPW.from_epw(
+                WEATHER_TESTS_DATA / "test_epw.epw", engine="python", columns=columns
+            )
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # unselected fields are never stored, nor split after the last selected one
+    assert peak_memory(("year",)) < peak_memory(None) / 4
+
+
+def test_columns_cache(epw, tmp_path):
+    cache = EPWCache(tmp_path / "cache")
+    for _ in range(2):  # miss, then hit
+        projected_epw = EPW.from_epw(
+            WEATHER_TESTS_DATA / "test_epw.epw", columns=("wind_speed",), cache=cache
+        )
+        assert projected_epw.records.field_names == ("wind_speed",)
+        np.testing.assert_array_equal(projected_epw.wind_speed, epw.wind_speed)
+
+
+def test_columns_invalid():
+    with pytest.raises(ValueError, match="invalid field name: 'wind_spead'"):
+        EPW.from_epw(WEATHER_TESTS_DATA / "test_epw.epw", columns=("wind_spead",))
+
+
+@pytest.mark.parametrize("engine", ["c", "python"])
+def test_dtypes_compact(epw, engine, tmp_path):
+    compact_epw = EPW.from_epw(
+        WEATHER_TESTS_DATA / "test_epw.epw", engine=engine, dtypes="compact"
+    )
+    assert compact_epw.month.dtype == np.int8
+    assert compact_epw.days_since_last_snowfall.dtype == np.int16
+    assert compact_epw.dry_bulb_temperature.dtype == np.float32
+    for field_name, field_type in epw.fields.items():
+        if field_type is float:
+            np.testing.assert_allclose(
+                getattr(compact_epw, field_name),
+                getattr(epw, field_name),
+                rtol=1e-6,
+            )
+        else:
+            np.testing.assert_array_equal(
+                getattr(compact_epw, field_name), getattr(epw, field_name)
+            )
+    assert sum(compact_epw.records.memory_usage().values()) < 0.5 * sum(
+        epw.records.memory_usage().values()
+    )
+
+    epw.to_epw(tmp_path / "default.epw")
+    compact_epw.to_epw(tmp_path / "compact.epw")
+    assert (tmp_path / "compact.epw").read_bytes() == (
+        tmp_path / "default.epw"
+    ).read_bytes()
+
+
+def test_dtypes_invalid():
+    epw_file = WEATHER_TESTS_DATA / "test_epw.epw"
+    with pytest.raises(ValueError, match="invalid dtypes: 'small'"):
+        EPW.from_epw(epw_file, dtypes="small")
+    with pytest.raises(ValueError, match="invalid dtype of 'year': 'float32'"):
+        EPW.from_epw(epw_file, dtypes={"year": "float32"})
+    with pytest.raises(ValueError, match="invalid int8 values of 'year'"):
+        EPW.from_epw(epw_file, dtypes={"year": "int8"})
+
+
+@pytest.fixture
+def sentinel_epw_file(tmp_path):
+    epw_lines = (WEATHER_TESTS_DATA / "test_epw.epw").read_text().splitlines()
+    epw_rows = [epw_line.split(",") for epw_line in epw_lines[8:12]]
+    epw_rows[0][6] = "99.9"  # missing dry_bulb_temperature
+    epw_rows[1][8] = "150"  # invalid relative_humidity
+    epw_rows[2][21] = "999"  # missing wind_speed
+    epw_rows[2][31] = "99"  # missing days_since_last_snowfall
+    sentinel_epw_file = tmp_path / "sentinel_epw.epw"
+    sentinel_epw_file.write_text(
+        "\n".join(epw_lines[:8] + [",".join(epw_row) for epw_row in epw_rows]) + "\n"
+    )
+    return sentinel_epw_file
+
+
+def test_validate(epw, sentinel_epw_file):
+    assert epw.validate().valid
+    assert epw.validate() is epw.validate()  # memoised
+
+    validation = EPW.from_epw(sentinel_epw_file).validate()
+    assert not validation.valid
+    assert validation.rows().tolist() == [1]
+    assert validation.rows("missing").tolist() == [0, 2]
+    assert validation.mask("relative_humidity").tolist() == [False, True, False, False]
+    assert {
+        field_name: num_missing
+        for field_name, num_missing in validation.counts("missing").items()
+        if num_missing
+    } == {
+        "dry_bulb_temperature": 1,
+        "wind_speed": 1,
+        "days_since_last_snowfall": 1,
+    }
+    with pytest.raises(ValueError, match="invalid relative_humidity at row 1: '150.0'"):
+        EPW.from_epw(sentinel_epw_file, validate=True)
+
+
+@pytest.mark.parametrize("dtypes", [None, "compact"])
+def test_missing_as_nan(sentinel_epw_file, dtypes):
+    nan_epw = EPW.from_epw(sentinel_epw_file, dtypes=dtypes, missing_as_nan=True)
+    assert np.isnan(nan_epw.dry_bulb_temperature).tolist() == [
+        True,
+        False,
+        False,
+        False,
+    ]
+    assert np.isnan(nan_epw.wind_speed).tolist() == [False, False, True, False]
+    assert nan_epw.days_since_last_snowfall[2] == 99  # integer fields are kept
+    assert nan_epw.validate().rows("missing").tolist() == [0, 2]
+    dry_bulb_temperature = np.concatenate(
+        [
+            chunk["dry_bulb_temperature"]
+            for chunk in EPW.iter_records(sentinel_epw_file, 3, missing_as_nan=True)
+        ]
+    )
+    assert np.isnan(dry_bulb_temperature).tolist() == [True, False, False, False]
+
+
+def test_to_epw(epw, tmp_path):
+    epw_file = tmp_path / "test_epw.epw"
+    epw.to_epw(epw_file, chunksize=1000)
+    roundtrip_epw = EPW.from_epw(epw_file)
+    assert roundtrip_epw.holidays_daylight_saving.records == ()
+    for field_name in epw.fields:
+        np.testing.assert_array_equal(
+            getattr(roundtrip_epw, field_name), getattr(epw, field_name)
+        )
+
+
+def test_to_epw_nan(epw, tmp_path):
+    nan_epw = replace(
+        epw,
+        records=rectable(
+            epw.records.columns
+            | {
+                "present_weather_codes": np.full(len(epw.records), "nan", dtype=object),
+                "albedo": np.full(len(epw.records), np.nan),
+            }
+        ),
+    )
+    nan_epw.to_epw(tmp_path / "nan_epw.epw")
+    epw_record = (tmp_path / "nan_epw.epw").read_text().splitlines()[8]
+    assert epw_record.split(",")[27:] == (
+        ["nan", "0.0", "0.04", "0.0", "88", "", "0.0", "0.0"]  # exact per field
+    )
+
+    zero_epw = replace(  # distinct values are formatted once, by their bits
+        epw,
+        records=epw.records.replace(
+            {
+                "albedo": np.tile(
+                    [
+                        -0.0,
+                        0.0,
+                        np.nan,
+                        np.frombuffer(np.uint64(0x7FF8000000000123))[0],
+                    ],
+                    len(epw.records) // 4,
+                )
+            }
+        ),
+    )
+    zero_epw.to_epw(tmp_path / "zero_epw.epw")
+    assert [
+        epw_line.split(",")[32]
+        for epw_line in (tmp_path / "zero_epw.epw").read_text().splitlines()[8:12]
+    ] == ["-0.0", "0.0", "", ""]
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".bz2", ".xz"])
+@pytest.mark.parametrize("engine", ["c", "python"])
+def test_compressed(epw, tmp_path, suffix, engine):
+    epw_file = tmp_path / f"test_epw.epw{suffix}"
+    epw.to_epw(epw_file)
+    assert (
+        epw_file.stat().st_size
+        < (WEATHER_TESTS_DATA / "test_epw.epw").stat().st_size / 3
+    )
+    compressed_epw = EPW.from_epw(epw_file, engine=engine)
+    np.testing.assert_array_equal(
+        compressed_epw.dry_bulb_temperature, epw.dry_bulb_temperature
+    )
+    assert EPW.read_header(epw_file)["location"].city == epw.location.city
+    assert sum(map(len, EPW.iter_records(epw_file, 5000, engine=engine))) == 8760
+
+
+def test_archive(epw, tmp_path):
+    archive_file = tmp_path / "weather.zip"
+    with zipfile.ZipFile(archive_file, "w", zipfile.ZIP_DEFLATED) as archive:
+        for member in ("a/test_epw.epw", "b/test_epw.EPW"):
+            archive.write(WEATHER_TESTS_DATA / "test_epw.epw", member)
+        archive.writestr("a/test_epw.stat", "not an epw")
+
+    members = tuple(EPW.from_archive(archive_file, columns=("dry_bulb_temperature",)))
+    assert [member for member, _ in members] == ["a/test_epw.epw", "b/test_epw.EPW"]
+    for _, archive_epw in members:
+        np.testing.assert_array_equal(
+            archive_epw.dry_bulb_temperature, epw.dry_bulb_temperature
+        )
+
+    zip_source = f"zip://a/test_epw.epw::{archive_file}"
+    np.testing.assert_array_equal(
+        EPW.from_epw(zip_source).dry_bulb_temperature, epw.dry_bulb_temperature
+    )
+    cache = EPWCache(tmp_path / "cache")
+    EPW.from_epw(zip_source, cache=cache)
+    assert EPW.from_epw(zip_source, cache=cache).records.field_names == tuple(
+        epw.fields
+    )
+    with pytest.raises(FileNotFoundError, match="no such zip member"):
+        EPW.from_epw(f"zip://missing.epw::{archive_file}")
+    with pytest.raises(ValueError, match="invalid zip source"):
+        EPW.from_epw(f"zip://{archive_file}")
+    with pytest.raises(ValueError, match="cannot write into a zip archive"):
+        epw.to_epw(zip_source)
+
+
+def test_to_epw_float_format(epw, tmp_path):
+    float_format = dict.fromkeys(
+        (
+            field_name
+            for field_name, field_type in epw.fields.items()
+            if field_type is float
+        ),
+        "%.0f",
+    ) | {
+        "dry_bulb_temperature": "%.1f",
+        "dew_point_temperature": "%.1f",
+        "wind_speed": "%.1f",
+        "visibility": "%.1f",
+        "aerosol_optical_depth": "%.4f",
+        "albedo": "%.3f",
+        "liquid_precipitation_depth": "%.1f",
+        "liquid_precipitation_quantity": "%.1f",
+    }
+    epw.to_epw(tmp_path / "test_epw.epw", float_format=float_format)
+    assert (tmp_path / "test_epw.epw").read_text().splitlines()[8:] == (
+        (WEATHER_TESTS_DATA / "test_epw.epw").read_text().splitlines()[8:]
+    )
+
+
+def test_exports(epw):
+    records_df = epw.records.to_pandas()
+    assert records_df.shape == (8760, 35)
+    assert np.shares_memory(
+        records_df["dry_bulb_temperature"].to_numpy(), epw.dry_bulb_temperature
+    )
+    records_array = epw.records.to_numpy()
+    assert records_array.dtype.names == tuple(epw.fields.keys())
+    assert records_array[0].tolist() == epw.records[0]
+
+
+def test_to_arrow(epw):
+    pa = pytest.importorskip("pyarrow")
+    records_table = epw.records.to_arrow()
+    assert records_table.num_rows == 8760
+    assert records_table.schema.field("year").type == pa.int64()
+    assert records_table.column("present_weather_codes")[0].as_py() == "999999999"
+
+
+def test_records_repr(epw, monkeypatch):
+    monkeypatch.setattr(rectable, "to_pandas", None)  # must not build a DataFrame
+    records_repr = repr(epw.records)
+    assert len(records_repr.splitlines()) == 1 + 11 + 2
+    assert records_repr.endswith("[8760 rows x 35 columns]")
+    assert "liquid_precipitation_quantity" in records_repr
+    assert "<td>1991</td>" in epw.records._repr_html_()
+
+
+def test_timestamps(epw):
+    timestamps = epw.timestamps
+    assert timestamps is epw.timestamps  # cached
+    assert timestamps.dtype == np.dtype("datetime64[m]")
+    assert np.all(np.diff(timestamps) == np.timedelta64(60, "m"))
+    assert timestamps[0] == np.datetime64("1991-01-01T01:00")  # hour-ending
+    assert timestamps[-1] == np.datetime64("1992-01-01T00:00")
+
+
+def test_between(epw):
+    first_day = epw.between("1991-01-01", "1991-01-02")
+    assert len(first_day.records) == 24
+    assert first_day.location is epw.location
+    assert np.shares_memory(first_day.dry_bulb_temperature, epw.dry_bulb_temperature)
+    assert tuple(first_day.hour) == tuple(range(1, 25))
+
+
+def test_period(epw):
+    week = epw.period("Summer - Week Nearest Max Temperature For Period")
+    assert len(week.records) == 168
+    assert week.records[0][1:4] == (8, 17, 1)
+    assert week.records[-1][1:4] == (8, 23, 24)
+    assert len(epw.period("Data").records) == 8760
+
+    new_year = replace(  # across the year end, wrapped around to the first records
+        epw,
+        typical_extreme_periods=replace(
+            epw.typical_extreme_periods,
+            records=(("New Year - Week", "Typical", "12/29", "1/ 4"),),
+        ),
+    ).period("New Year - Week")
+    assert len(new_year.records) == 168
+    assert new_year.records[0][1:4] == (12, 29, 1)
+    assert new_year.records[71][1:4] == (12, 31, 24)
+    assert new_year.records[72][1:4] == (1, 1, 1)
+    assert new_year.records[-1][1:4] == (1, 4, 24)
+    assert not np.shares_memory(new_year.hour, epw.hour)
+    with pytest.raises(ValueError, match="invalid period name"):
+        epw.period("Monsoon")
+    with pytest.raises(ValueError, match="invalid year"):
+        epw.period("Data", year=1990)
+
+
+def test_period_years(tmp_path):
+    epw_lines = (WEATHER_TESTS_DATA / "test_epw.epw").read_text().splitlines()
+    epw_rows = [epw_line.split(",") for epw_line in epw_lines[8:]]
+    rising_epw_file = tmp_path / "rising_epw.epw"  # a typical year, sources in order
+    rising_epw_file.write_text(
+        "\n".join(
+            epw_lines[:8]
+            + [",".join([str(1980 + int(row[1])), *row[1:]]) for row in epw_rows]
+        )
+        + "\n"
+    )
+    rising_epw = EPW.from_epw(rising_epw_file)
+    assert np.all(
+        rising_epw.timestamps[:-1].astype("datetime64[Y]") == np.datetime64("1981")
+    )
+    week = rising_epw.period("Summer - Week Nearest Max Temperature For Period")
+    assert len(week.records) == 168
+    assert week.records[0][:4] == (1988, 8, 17, 1)
+    assert len(rising_epw.period("Data").records) == 8760
+
+    multi_epw_file = tmp_path / "multi_epw.epw"  # two actual years
+    multi_epw_file.write_text(
+        "\n".join(
+            epw_lines[:8]
+            + [
+                ",".join([str(year), *row[1:]])
+                for year in (2001, 2002)
+                for row in epw_rows
+            ]
+        )
+        + "\n"
+    )
+    multi_epw = EPW.from_epw(multi_epw_file)
+    assert multi_epw.timestamps[0] == np.datetime64("2001-01-01T01:00")
+    assert len(multi_epw.period("Data").records) == 2 * 8760  # every year
+    weeks = multi_epw.period("Summer - Week Nearest Max Temperature For Period")
+    assert len(weeks.records) == 2 * 168
+    assert (weeks.year[0], weeks.year[-1]) == (2001, 2002)
+    week = multi_epw.period(
+        "Summer - Week Nearest Max Temperature For Period", year=2002
+    )
+    assert len(week.records) == 168
+    assert set(week.year.tolist()) == {2002}
+    assert np.shares_memory(week.hour, multi_epw.hour)  # one slice, a view
+    new_year_epw = replace(
+        multi_epw,
+        typical_extreme_periods=replace(
+            multi_epw.typical_extreme_periods,
+            records=(("New Year - Week", "Typical", "12/29", "1/ 4"),),
+        ),
+    )
+    new_year = new_year_epw.period("New Year - Week", year=2001)
+    assert len(new_year.records) == 168  # into the next year
+    assert new_year.records[-1][:4] == (2002, 1, 4, 24)
+    assert len(new_year_epw.period("New Year - Week").records) == 168 + 72  # clipped
+
+
+@pytest.mark.parametrize("freq, key_names", (("D", ["month", "day"]), ("M", ["month"])))
+@pytest.mark.parametrize("how", ("mean", "min", "max", "sum"))
+def test_resample(epw, freq, key_names, how):
+    fields = ("dry_bulb_temperature", "wind_speed")
+    resampled = epw.resample(freq, fields, how)
+    assert resampled is epw.resample(freq, fields, how)  # memoised
+    expected_df = (
+        epw.records.to_pandas().groupby(key_names, sort=False)[list(fields)].agg(how)
+    )
+    for field_name in fields:
+        np.testing.assert_allclose(resampled[field_name], expected_df[field_name])
+
+
+def test_resample_nan(epw):
+    dry_bulb_temperature = epw.dry_bulb_temperature.copy()
+    dry_bulb_temperature[:12] = np.nan
+    nan_epw = replace(
+        epw,
+        records=rectable(
+            epw.records.columns | {"dry_bulb_temperature": dry_bulb_temperature}
+        ),
+    )
+    daily_means = nan_epw.resample("D", ("dry_bulb_temperature",))
+    assert daily_means["dry_bulb_temperature"][0] == pytest.approx(
+        np.mean(epw.dry_bulb_temperature[12:24])
+    )
+
+
+def test_degree_days(epw):
+    daily_means = (
+        epw.records.to_pandas()
+        .groupby(["month", "day"], sort=False)["dry_bulb_temperature"]
+        .mean()
+    )
+    degree_days = epw.degree_days(15.5)
+    assert tuple(degree_days["month"]) == tuple(range(1, 13))
+    assert degree_days["heating_degree_days"].sum() == pytest.approx(
+        (15.5 - daily_means).clip(lower=0).sum()
+    )
+    assert degree_days["cooling_degree_days"].sum() == pytest.approx(
+        (daily_means - 15.5).clip(lower=0).sum()
+    )
+    assert len(epw.degree_days(15.5, "D")) == 365
+
+
+def test_derived_fields():
+    epw = EPW.from_epw(WEATHER_TESTS_DATA / "test_epw.epw")
+    records = epw.records[:3]
+    derived_epw = replace(
+        epw,
+        records=rectable(
+            records.columns
+            | {
+                "dry_bulb_temperature": np.array([20.0, -5.0, 35.0]),
+                "dew_point_temperature": np.array([10.0, -10.0, 20.0]),
+                "atmospheric_station_pressure": np.full(3, 101325.0),
+            }
+        ),
+    )
+    np.testing.assert_allclose(
+        derived_epw.humidity_ratio, (0.007630, 0.001599, 0.014695), atol=1e-6
+    )
+    np.testing.assert_allclose(derived_epw.enthalpy, (39487, -1045, 72919), atol=1)
+    np.testing.assert_allclose(
+        derived_epw.wet_bulb_temperature, (14.13, -6.58, 24.29), atol=0.01
+    )
+    np.testing.assert_allclose(
+        derived_epw.air_density, (1.1986, 1.3151, 1.1355), atol=1e-4
+    )
+
+    enthalpy = derived_epw.enthalpy
+    assert derived_epw.enthalpy is enthalpy  # cached
+    assert not enthalpy.flags.writeable
+    derived_epw.records["wind_speed"] = np.zeros(3)
+    assert derived_epw.enthalpy is enthalpy
+    derived_epw.records["dew_point_temperature"] = np.array([20.0, -10.0, 20.0])
+    assert derived_epw.enthalpy[0] > enthalpy[0]  # invalidated, via humidity_ratio
+    assert derived_epw.enthalpy[1] == enthalpy[1]
+
+    with pytest.raises(AttributeError, match="needs atmospheric_station_pressure"):
+        EPW.from_epw(
+            WEATHER_TESTS_DATA / "test_epw.epw", columns=("dry_bulb_temperature",)
+        ).enthalpy
+
+
+def test_solar_position(epw, monkeypatch):
+    solar_position = epw.solar_position()
+    assert solar_position.field_names == (
+        "hour_angle",
+        "declination",
+        "zenith",
+        "azimuth",
+        "equation_of_time",
+    )
+    assert len(solar_position) == len(epw.records)
+    summer_noon = np.flatnonzero(
+        (epw.records["month"] == 6)
+        & (epw.records["day"] == 21)
+        & (epw.records["hour"] == 13)  # 12:00-13:00
+    )[0]
+    assert abs(solar_position["hour_angle"][summer_noon]) < 10
+    assert solar_position["declination"][summer_noon] == pytest.approx(23.44, abs=0.1)
+    assert solar_position["zenith"][summer_noon] == pytest.approx(28.1, abs=1.5)
+    assert 90 < solar_position["azimuth"][summer_noon] < 270  # due south
+    extraterrestrial = epw.records["extraterrestrial_horizontal_radiation"]
+    daytime = extraterrestrial > 0
+    assert np.corrcoef(
+        np.cos(np.radians(solar_position["zenith"][daytime])),
+        extraterrestrial[daytime],
+    )[0, 1] == pytest.approx(1, abs=0.01)
+
+    _SOLAR_CACHE.clear()
+    for _ in range(3):  # other scenario files of the same station and time grid
+        scenario_epw = EPW.from_epw(WEATHER_TESTS_DATA / "test_epw.epw")
+        assert np.shares_memory(
+            scenario_epw.solar_position()["zenith"], epw.solar_position()["zenith"]
+        )
+    assert _SOLAR_CACHE.misses == 1
+    moved_epw = replace(epw, location=replace(epw.location, latitude=-33.9))
+    assert moved_epw.solar_position()["zenith"][summer_noon] == pytest.approx(
+        57.3, abs=1.5
+    )  # southern winter
+    assert _SOLAR_CACHE.misses == 2
+
+    # bounded by the bytes of the cached columns, not by the number of entries
+    entry_bytes = _SOLAR_CACHE.num_bytes // 2
+    monkeypatch.setattr(_SOLAR_CACHE, "max_bytes", entry_bytes * 3 // 2)
+    for latitude in (10.0, 20.0, 30.0):
+        replace(epw, location=replace(epw.location, latitude=latitude)).solar_position()
+    assert len(_SOLAR_CACHE) == 1
+    assert _SOLAR_CACHE.num_bytes <= _SOLAR_CACHE.max_bytes
+    monkeypatch.setattr(_SOLAR_CACHE, "max_bytes", entry_bytes // 2)
+    epw.solar_position()  # larger than the whole budget, not kept
+    assert len(_SOLAR_CACHE) == 0
+    assert _SOLAR_CACHE.num_bytes == 0
+
+
+def test_morph(epw):
+    timestamps = epw.timestamps
+    warmer_epw = epw.morph({"dry_bulb_temperature": lambda t: t + 2})
+    assert warmer_epw.location is epw.location  # headers shared
+    assert warmer_epw.records["wind_speed"].base is epw.records["wind_speed"].base
+    assert warmer_epw.timestamps is timestamps  # memoised values kept
+    np.testing.assert_allclose(
+        warmer_epw.dry_bulb_temperature, epw.dry_bulb_temperature + 2
+    )
+    assert not warmer_epw.records["dry_bulb_temperature"].flags.writeable
+    assert warmer_epw.records.dirty == {"dry_bulb_temperature": (0, len(epw.records))}
+    assert epw.records.dirty == {}
+
+    shifts = np.arange(1, 5)[:, np.newaxis]
+    variant_epws = epw.morph_many(
+        {
+            "dry_bulb_temperature": lambda t: t + shifts,
+            "global_horizontal_radiation": lambda r: r * 1.1,  # one row, shared
+        }
+    )
+    assert len(variant_epws) == 4
+    for shift, variant_epw in zip(shifts[:, 0], variant_epws, strict=True):
+        np.testing.assert_allclose(
+            variant_epw.dry_bulb_temperature, epw.dry_bulb_temperature + shift
+        )
+        assert np.shares_memory(
+            variant_epw.records["global_horizontal_radiation"],
+            variant_epws[0].records["global_horizontal_radiation"],
+        )
+        assert variant_epw.records["year"].base is epw.records["year"].base
+    assert np.shares_memory(
+        variant_epws[0].records["dry_bulb_temperature"],
+        variant_epws[-1].records["dry_bulb_temperature"].base,
+    )  # one block of all variants
+    assert epw.dry_bulb_temperature[0] == 2.7  # unchanged
+
+    compact_epw = EPW.from_epw(WEATHER_TESTS_DATA / "test_epw.epw", dtypes="compact")
+    assert (
+        compact_epw.morph({"dry_bulb_temperature": lambda t: t + 2.0})
+        .records["dry_bulb_temperature"]
+        .dtype
+        == np.float32
+    )  # dtype kept
+    with pytest.raises(ValueError, match="invalid int64 values of 'day'"):
+        epw.morph({"day": lambda d: d + 0.5})
+    with pytest.raises(ValueError, match="invalid loaded field name"):
+        epw.morph_many({"enthalpy": lambda h: h})
+    with pytest.raises(ValueError, match="invalid transform shape"):
+        epw.morph_many({"dry_bulb_temperature": lambda t: t[0]})
+    with pytest.raises(ValueError, match="unequal numbers of variants"):
+        epw.morph_many(
+            {
+                "dry_bulb_temperature": lambda t: t + shifts,
+                "relative_humidity": lambda h: np.vstack((h, h)),
+            }
+        )
+
+
+def test_update_epw(tmp_path):
+    epw_file = tmp_path / "test_epw.epw"
+    epw_file.write_bytes((WEATHER_TESTS_DATA / "test_epw.epw").read_bytes())
+    epw_lines = epw_file.read_text().splitlines()
+    epw = EPW.from_epw(epw_file)
+
+    epw.wind_speed = epw.wind_speed.copy()  # equal values, nothing dirty
+    assert epw.records.dirty == {}
+    dry_bulb_temperature = epw.dry_bulb_temperature.copy()
+    dry_bulb_temperature[[100, 102]] = (21.5, np.nan)
+    epw.dry_bulb_temperature = dry_bulb_temperature
+    epw.days_since_last_snowfall = np.full(len(epw.records), 99, dtype=np.int16)
+    assert epw.records["days_since_last_snowfall"].dtype == np.int64
+    assert epw.records.dirty == {
+        "dry_bulb_temperature": (100, 103),
+        "days_since_last_snowfall": (0, len(epw.records)),
+    }
+    with pytest.raises(ValueError, match="invalid dtype of 'year'"):
+        epw.year = np.full(len(epw.records), "1991")
+    with pytest.raises(ValueError, match="invalid dtype of 'day'"):
+        epw.day = epw.day + 0.5
+    with pytest.raises(ValueError, match="unequal length"):
+        epw.wind_speed = epw.wind_speed[:-1]
+    shared_epw = replace(epw)  # sharing the records, copy-on-write
+    shared_epw.wind_speed = 5.0  # a scalar, for every record
+    assert np.all(shared_epw.wind_speed == 5.0)
+    assert not np.all(epw.wind_speed == 5.0)
+    assert "wind_speed" not in epw.records.dirty
+
+    epw.location.city = "LONDON"  # NOTE: epw_lines[0] is kept in the test
+    epw.update_epw(epw_file, float_format={"dry_bulb_temperature": "%.1f"})
+    assert epw.records.dirty == {}
+    updated_lines = epw_file.read_text().splitlines()
+    assert updated_lines[0] == epw_lines[0].replace("LONDON/GATWICK", "LONDON")
+    assert updated_lines[1:8] == epw_lines[1:8]  # copied as they are
+    snowfall_idx = tuple(EPW.fields).index("days_since_last_snowfall")
+    assert [
+        line_idx
+        for line_idx, (line, updated_line) in enumerate(
+            zip(epw_lines, updated_lines, strict=True)
+        )
+        if line.split(",")[:snowfall_idx] != updated_line.split(",")[:snowfall_idx]
+    ] == [0, 108, 110]
+    assert all(
+        line.split(",")[snowfall_idx + 1 :]
+        == updated_line.split(",")[snowfall_idx + 1 :]
+        for line, updated_line in zip(epw_lines, updated_lines, strict=True)
+    )
+    assert updated_lines[108].split(",")[6] == "21.5"
+    assert updated_lines[110].split(",")[6] == ""
+    updated_epw = EPW.from_epw(epw_file)
+    np.testing.assert_array_equal(
+        updated_epw.dry_bulb_temperature, dry_bulb_temperature
+    )
+    assert np.all(updated_epw.days_since_last_snowfall == 99)
+    assert all(  # crlf as in the fixture, also of the rewritten lines
+        line.endswith(b"\r\n") for line in epw_file.read_bytes().splitlines(True)
+    )
+
+    epw_byte_lines = epw_file.read_bytes().splitlines(True)
+    wind_speed = updated_epw.wind_speed.copy()
+    wind_speed[5] = 12.5
+    updated_epw.wind_speed = wind_speed
+    updated_epw.update_epw(epw_file)
+    updated_byte_lines = epw_file.read_bytes().splitlines(True)
+    assert [
+        line_idx
+        for line_idx, (line, updated_line) in enumerate(
+            zip(epw_byte_lines, updated_byte_lines, strict=True)
+        )
+        if line != updated_line
+    ] == [13]
+    updated_parts = updated_byte_lines[13].split(b",")
+    assert updated_parts[21] == b"12.5"
+    assert updated_parts[:21] + updated_parts[22:] == (
+        epw_byte_lines[13].split(b",")[:21] + epw_byte_lines[13].split(b",")[22:]
+    )
+
+    epw_bytes = epw_file.read_bytes()
+    epw.update_epw(epw_file)  # nothing changed, not rewritten
+    assert epw_file.read_bytes() == epw_bytes
+    with pytest.raises(ValueError, match="invalid epw file to update"):
+        epw.between("1991-01-01", "1991-01-02").update_epw(epw_file)
+    assert epw_file.read_bytes() == epw_bytes
+    assert [path.name for path in tmp_path.iterdir()] == ["test_epw.epw"]
+
+
+def test_cli(epw, sentinel_epw_file, tmp_path, capsys):
+    epw_bytes = (WEATHER_TESTS_DATA / "test_epw.epw").read_bytes()
+    (tmp_path / "epws" / "sub").mkdir(parents=True)
+    (tmp_path / "epws" / "a.epw").write_bytes(epw_bytes)
+    (tmp_path / "epws" / "sub" / "b.epw.gz").write_bytes(gzip.compress(epw_bytes))
+    (tmp_path / "epws" / "notes.txt").write_text("not an epw")
+    epw_files = [
+        str(tmp_path / "epws" / "a.epw"),
+        str(tmp_path / "epws" / "sub" / "b.epw.gz"),
+    ]
+
+    assert main(["summary", str(tmp_path / "epws"), "-j", "1"]) == 0
+    summary_lines = capsys.readouterr().out.splitlines()
+    assert len(summary_lines) == 2 * (2 + 12)  # location, column names, months
+    assert summary_lines[0].startswith(f"{epw_files[0]}: LONDON/GATWICK, -, GBR")
+    assert summary_lines[2].split()[1:] == summary_lines[16].split()[1:]
+
+    assert main(["headers", str(tmp_path / "epws" / "**" / "*.epw*"), "-j", "2"]) == 0
+    headers = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [header["file"] for header in headers] == epw_files  # in order
+    assert headers[0]["location"]["latitude"] == epw.location.latitude
+    assert headers[0]["data_periods"]["records"][0][0] == "Data"
+
+    assert main(["validate", epw_files[0], str(sentinel_epw_file), "-j", "1"]) == 1
+    validate_lines = capsys.readouterr().out.splitlines()
+    assert validate_lines == [
+        f"{epw_files[0]}: ok, 8760 records, 0 missing values",
+        f"{sentinel_epw_file}: invalid, 1 records, relative_humidity 1",
+    ]
+
+    to_formats = ("csv", "npz") + (
+        ("parquet",) if importlib.util.find_spec("pyarrow") else ()
+    )
+    for to_format in to_formats:
+        output_dir = tmp_path / to_format
+        assert (
+            main(["convert", epw_files[1], "--to", to_format, "-o", str(output_dir)])
+            == 0
+        )
+        assert (
+            main(["convert", str(output_dir), "--to", "epw", "-o", str(output_dir)])
+            == 0
+        )
+        converted_epw = EPW.from_epw(output_dir / "b.epw")
+        assert converted_epw.location.city == epw.location.city
+        assert converted_epw.records.field_names == epw.records.field_names
+        for field_name in epw.records.field_names:
+            np.testing.assert_array_equal(
+                converted_epw.records[field_name], epw.records[field_name]
+            )
+    capsys.readouterr()
+
+    assert main(["summary", str(tmp_path / "missing.epw"), epw_files[0]]) == 1
+    captured = capsys.readouterr()
+    assert "FileNotFoundError" in captured.err
+    assert captured.out.startswith(f"{epw_files[0]}: LONDON/GATWICK")
+    assert main(["headers", str(tmp_path / "none" / "*.epw")]) == 2
+
+
+def test_cli_broken_pipe(tmp_path):
+    header_lines = (WEATHER_TESTS_DATA / "test_epw.epw").read_bytes().splitlines(True)
+    for idx in range(200):  # more output than a pipe buffers
+        (tmp_path / f"{idx}.epw").write_bytes(b"".join(header_lines[:8]))
+    with subprocess.Popen(
+        (sys.executable, "-m", "weather", "headers", str(tmp_path), "-j", "1"),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=WEATHER_TESTS_DIRECTORY.parent,
+    ) as cli:
+        assert json.loads(cli.stdout.readline())["file"] == str(tmp_path / "0.epw")
+        cli.stdout.close()  # as head does
+        assert cli.stderr.read() == b""  # no traceback
+        assert cli.wait() == 141
+
+
+def test_fingerprint(epw, sentinel_epw_file):
+    fingerprint = epw.fingerprint()
+    assert len(fingerprint) == 32
+    assert (
+        EPW.from_epw(WEATHER_TESTS_DATA / "test_epw.epw", engine="python").fingerprint()
+        == fingerprint
+    )
+    assert epw.morph({"dry_bulb_temperature": lambda t: t * 1.0}).fingerprint() == (
+        fingerprint
+    )
+    assert replace(epw, location=replace(epw.location, city="X")).fingerprint() != (
+        fingerprint
+    )
+
+    nan_epw = EPW.from_epw(sentinel_epw_file, missing_as_nan=True)
+    other_nan = np.frombuffer(np.uint64(0x7FF8000000000123).tobytes())[0]
+    assert (
+        nan_epw.morph(
+            {"dry_bulb_temperature": lambda t: np.where(np.isnan(t), other_nan, t)}
+        ).fingerprint()
+        == nan_epw.fingerprint()
+    )  # nan-aware, whatever the payload
+    assert EPW.from_epw(sentinel_epw_file).fingerprint() != nan_epw.fingerprint()
+
+    time_epw = EPW.from_epw(
+        WEATHER_TESTS_DATA / "test_epw.epw",
+        columns=("year", "month", "day", "hour", "minute"),
+    )
+    time_fingerprint = time_epw.fingerprint()
+    assert time_epw.validate().valid
+    with pytest.raises(AttributeError, match="wind_speed is not loaded"):
+        time_epw.wind_speed = np.full(len(time_epw.records), 500.0)
+    assert time_epw.fingerprint() == time_fingerprint
+    time_epw.records["wind_speed"] = np.full(len(time_epw.records), 500.0)
+    assert time_epw.fingerprint() != time_fingerprint  # nothing memoised is stale
+    assert not time_epw.validate().valid
+
+
+def test_diff(epw):
+    assert epw.diff(epw).identical
+    assert repr(epw.diff(epw)) == "<EPWDiff: 0 headers, 0 fields, 0 rows>"
+
+    dry_bulb_temperature = epw.dry_bulb_temperature.copy()
+    dry_bulb_temperature[100:103] += 0.05
+    dry_bulb_temperature[500] = np.nan
+    changed_epw = replace(
+        epw.morph(
+            {
+                "dry_bulb_temperature": lambda _: dry_bulb_temperature,
+                "present_weather_codes": lambda codes: np.where(
+                    np.arange(len(codes)) == 8759, "X", codes
+                ),
+            }
+        ),
+        location=replace(epw.location, elevation=63.0),
+    )
+    diff = epw.diff(changed_epw)
+    assert not diff.identical
+    assert diff.headers == ("location",)
+    assert diff.fields == {
+        "dry_bulb_temperature": ((100, 103), (500, 501)),
+        "present_weather_codes": ((8759, 8760),),
+    }
+    assert diff.num_changed_rows == 5
+    assert epw.diff(changed_epw, atol=0.1).fields.keys() == {
+        "dry_bulb_temperature",  # the nan only
+        "present_weather_codes",
+    }
+    assert epw.diff(changed_epw, atol=0.1).fields["dry_bulb_temperature"] == (
+        (500, 501),
+    )
+
+    compact_epw = EPW.from_epw(WEATHER_TESTS_DATA / "test_epw.epw", dtypes="compact")
+    assert epw.diff(compact_epw, rtol=1e-6).identical  # float32 vs float64
+    short_epw = EPW.from_epw(
+        WEATHER_TESTS_DATA / "test_epw.epw",
+        columns=("year", "month", "day", "hour", "minute"),
+    ).between("1991-01-01", "1991-01-02")
+    short_diff = epw.diff(short_epw)
+    assert short_diff.num_rows == (8760, 24)
+    assert short_diff.fields == {}
+    assert len(short_diff.missing_fields) == len(EPW.fields) - 5
+
+
+@pytest.fixture
+def epw_dir(tmp_path):
+    epw_text = (WEATHER_TESTS_DATA / "test_epw.epw").read_text()
+    for sub_dir, city, country, latitude, longitude in (
+        ("gbr", "LONDON/GATWICK", "GBR", "51.15", "-0.18"),
+        ("gbr", "MANCHESTER", "GBR", "53.35", "-2.27"),
+        ("fra", "PARIS/ORLY", "FRA", "48.72", "2.38"),
+    ):
+        (tmp_path / sub_dir).mkdir(exist_ok=True)
+        (tmp_path / sub_dir / f"{city.split('/')[0].lower()}.epw").write_text(
+            epw_text.replace(
+                "LONDON/GATWICK,-,GBR,IWEC Data,037760,51.15,-0.18",
+                f"{city},-,{country},IWEC Data,037760,{latitude},{longitude}",
+                1,
+            )
+        )
+    return tmp_path
+
+
+def test_collection(epw_dir, monkeypatch):
+    collection = EPWCollection(epw_dir)
+    assert len(collection) == 0
+    collection.update()
+    assert len(collection) == 3
+    assert collection.location("fra/paris.epw").city == "PARIS/ORLY"
+
+    (nearest_file, distance), *_ = collection.nearest(51.47, -0.45)  # heathrow
+    assert nearest_file == epw_dir / "gbr" / "london.epw"
+    assert distance == pytest.approx(40, abs=5)
+    assert [epw_file.name for epw_file, _ in collection.nearest(51.47, -0.45, k=3)] == [
+        "london.epw",
+        "manchester.epw",
+        "paris.epw",
+    ]
+    assert [
+        epw_file.name for epw_file, _ in collection.nearest(51.47, -0.45, country="FRA")
+    ] == ["paris.epw"]
+    assert sorted(epw_file.name for epw_file in collection.filter(country="GBR")) == [
+        "london.epw",
+        "manchester.epw",
+    ]
+    assert collection.load(nearest_file).location.city == "LONDON/GATWICK"
+    with pytest.raises(ValueError, match="invalid k"):
+        collection.nearest(51.47, -0.45, k=-1)
+
+    # persisted and incremental
+    read_header = EPW.read_header
+    read_files = []
+    monkeypatch.setattr(
+        EPW,
+        "read_header",
+        lambda epw_file: read_files.append(epw_file) or read_header(epw_file),
+    )
+    (epw_dir / "fra" / "paris.epw").unlink()
+    (epw_dir / "gbr" / "gatwick.epw.gz").write_bytes(
+        gzip.compress((epw_dir / "gbr" / "london.epw").read_bytes())
+    )
+    collection = EPWCollection(epw_dir)
+    assert len(collection) == 3
+    collection.update()
+    assert read_files == [epw_dir / "gbr" / "gatwick.epw.gz"]
+    assert sorted(epw_file.name for epw_file in collection) == [
+        "gatwick.epw.gz",
+        "london.epw",
+        "manchester.epw",
+    ]
@@ -1,3 +1,15 @@
+from ._cache import EPWCache
+from ._collection import EPWCollection
+from ._diff import EPWDiff
+from ._profile import EPWProfiler
+from ._validation import EPWValidation
 from .epw import EPW
 
-__all__ = ("EPW",)
+__all__ = (
+    "EPW",
+    "EPWCache",
+    "EPWCollection",
+    "EPWDiff",
+    "EPWProfiler",
+    "EPWValidation",
+)
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+
+from ._epw_schema import _EPW_SCHEMA
+from ._io import _split_zip
+from ._tools import AnyStrPath, rectable
+
+_CACHE_FORMAT_VERSION = 1
+# any change to the schema or the cache format yields a new tag, hence a cache miss
+_SCHEMA_TAG = hashlib.blake2b(
+    json.dumps(
+        (_CACHE_FORMAT_VERSION, _EPW_SCHEMA), default=lambda obj: obj.__name__
+    ).encode(),
+    digest_size=4,
+).hexdigest()
+
+
+class EPWCache:
+    # an entry is a directory holding the pickled headers and one .npy per column,
+    # numeric columns are memory-mapped on reopen
+    __slots__ = ("cache_dir", "max_bytes")
+
+    def __init__(self, cache_dir: AnyStrPath, max_bytes: int = 2**30) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}: {self.cache_dir}>"
+
+    def key(self, epw_file: AnyStrPath) -> str:
+        # of the file on disk, i.e. the compressed file or the whole zip archive
+        epw_path, zip_member = _split_zip(epw_file)
+        epw_path = epw_path.resolve()
+        epw_stat = epw_path.stat()
+        with open(epw_path, "rb") as fp:
+            content_digest = hashlib.file_digest(fp, "blake2b").hexdigest()
+        path_digest = hashlib.blake2b(
+            f"{epw_path}|{zip_member}|{epw_stat.st_mtime_ns}|{epw_stat.st_size}|{content_digest}".encode(),
+            digest_size=16,
+        ).hexdigest()
+        return f"{_SCHEMA_TAG}-{path_digest}"
+
+    def get(
+        self, key: str, field_names: Iterable[str] | None = None
+    ) -> tuple[dict, rectable] | None:
+        entry_dir = self.cache_dir / key
+        try:
+            with open(entry_dir / "headers.pickle", "rb") as fp:
+                headers, all_field_names = pickle.load(fp)
+            columns = {
+                field_name: np.load(entry_dir / f"{field_name}.npy", mmap_mode="r")
+                for field_name in (
+                    all_field_names if field_names is None else field_names
+                )
+            }
+        except (FileNotFoundError, ValueError, pickle.UnpicklingError, EOFError):
+            return None
+        os.utime(entry_dir)  # for lru eviction
+        return headers, rectable(
+            {
+                field_name: column.astype(object)
+                if column.dtype.kind == "U"
+                else column
+                for field_name, column in columns.items()
+            }
+        )
+
+    def put(self, key: str, headers: dict, records: rectable) -> None:
+        tmp_dir = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir))
+        try:
+            with open(tmp_dir / "headers.pickle", "wb") as fp:
+                pickle.dump((headers, records.field_names), fp)
+            for field_name, column in records.columns.items():
+                np.save(
+                    tmp_dir / f"{field_name}.npy",
+                    column.astype(str) if column.dtype.kind == "O" else column,
+                    allow_pickle=False,
+                )
+            tmp_dir.rename(self.cache_dir / key)
+        except OSError:  # e.g. written concurrently by another process
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for entry_dir in self.cache_dir.iterdir():
+            if entry_dir.name.startswith("."):
+                continue
+            if not entry_dir.name.startswith(_SCHEMA_TAG):  # stale schema
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                continue
+            entry_size = sum(entry.stat().st_size for entry in entry_dir.iterdir())
+            entries.append((entry_dir.stat().st_mtime_ns, entry_size, entry_dir))
+
+        total_size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, entry_dir in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= entry_size
+
+    def clear(self) -> None:
+        for entry_dir in self.cache_dir.iterdir():
+            shutil.rmtree(entry_dir, ignore_errors=True)
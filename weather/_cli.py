@@ -0,0 +1,331 @@
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+
+from ._io import _EPW_SUFFIXES, _split_zip
+from ._tools import _NUMPY_DTYPES, AnyField, _import_pandas, rectable
+from .epw import _TIME_FIELDS, EPW
+
+_TABLE_SUFFIXES = (".csv", ".parquet", ".npz")
+_CONVERT_FORMATS = tuple(suffix[1:] for suffix in _EPW_SUFFIXES + _TABLE_SUFFIXES)
+_HEADERS_KEY = "_epw_headers"  # the 8 header lines, as json, next to the columns
+_BROKEN_PIPE_EXIT_CODE = 128 + 13  # as if killed by SIGPIPE, as shells report it
+_SUMMARY_FIELDS = (
+    "dry_bulb_temperature",
+    "relative_humidity",
+    "global_horizontal_radiation",
+)
+
+# (ok, stdout text, stderr text) of one file
+_TaskResult = tuple[bool, str | None, str | None]
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="weather", description="Batch tools for epw weather files."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command, command_help in (
+        ("summary", "print the location and monthly statistics"),
+        ("convert", "convert between epw, csv, parquet and npz"),
+        ("validate", "check the data ranges and missing values"),
+        ("headers", "dump the header metadata as json lines"),
+    ):
+        subparser = subparsers.add_parser(command, help=command_help)
+        subparser.add_argument(
+            "paths", nargs="+", help="files, directories or glob patterns"
+        )
+        subparser.add_argument(
+            "-j", "--jobs", type=int, default=os.cpu_count() or 1, help="processes"
+        )
+        if command == "convert":
+            subparser.add_argument("--to", required=True, choices=_CONVERT_FORMATS)
+            subparser.add_argument(
+                "-o", "--output-dir", help="default: next to each input file"
+            )
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error(f"invalid jobs: '{args.jobs}'.")
+
+    if args.command == "convert":
+        task: Callable[[str], _TaskResult] = partial(
+            _convert, to=args.to, output_dir=args.output_dir
+        )
+        suffixes = _EPW_SUFFIXES + _TABLE_SUFFIXES
+    else:
+        task = {"summary": _summary, "validate": _validate, "headers": _headers}[
+            args.command
+        ]
+        suffixes = _EPW_SUFFIXES
+    epw_files = _expand_paths(args.paths, suffixes)
+    if not epw_files:
+        print("no files found.", file=sys.stderr)
+        return 2
+
+    exit_code = 0
+    try:
+        for ok, stdout_text, stderr_text in _map_files(task, epw_files, args.jobs):
+            if stdout_text is not None:
+                print(stdout_text, flush=True)
+            if stderr_text is not None:
+                print(stderr_text, file=sys.stderr, flush=True)
+            exit_code |= not ok
+    except BrokenPipeError:  # e.g. piped into head, which exits early
+        # NOTE: the interpreter flushes stdout again at exit, hence devnull
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return _BROKEN_PIPE_EXIT_CODE
+    return exit_code
+
+
+def _expand_paths(paths: Iterable[str], suffixes: tuple[str, ...]) -> list[str]:
+    # files as given, globs expanded and directories searched recursively, in order
+    epw_files: dict[str, None] = {}
+    for path in paths:
+        matched_paths = (
+            sorted(glob.glob(path, recursive=True)) if glob.has_magic(path) else (path,)
+        )
+        for matched_path in matched_paths:
+            if os.path.isdir(matched_path):
+                epw_files.update(
+                    dict.fromkeys(
+                        sorted(
+                            str(file_path)
+                            for file_path in Path(matched_path).rglob("*")
+                            if file_path.name.lower().endswith(suffixes)
+                            and file_path.is_file()
+                        )
+                    )
+                )
+            else:
+                epw_files[matched_path] = None
+    return list(epw_files)
+
+
+def _map_files(
+    task: Callable[[str], _TaskResult], epw_files: list[str], jobs: int
+) -> Iterator[_TaskResult]:
+    # in order, one file at a time per process, so the output streams as it comes
+    tasks = partial(_run_task, task)
+    if (jobs == 1) or (len(epw_files) == 1):
+        yield from map(tasks, epw_files)
+        return
+    jobs = min(jobs, len(epw_files))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(
+            tasks, epw_files, chunksize=max(1, len(epw_files) // (jobs * 16))
+        )
+
+
+def _run_task(task: Callable[[str], _TaskResult], epw_file: str) -> _TaskResult:
+    try:
+        return task(epw_file)
+    except Exception as e:
+        return False, None, f"{epw_file}: {type(e).__name__}: {e}"
+
+
+def _summary(epw_file: str) -> _TaskResult:
+    # only the columns needed are loaded
+    epw = EPW.from_epw(epw_file, columns=_TIME_FIELDS + _SUMMARY_FIELDS)
+    location = epw.location  # type: ignore[attr-defined] # python/mypy#6063
+    means = epw.resample("M", _SUMMARY_FIELDS[:2])
+    mins = epw.resample("M", _SUMMARY_FIELDS[:1], "min")
+    maxs = epw.resample("M", _SUMMARY_FIELDS[:1], "max")
+    sums = epw.resample("M", _SUMMARY_FIELDS[2:], "sum")
+    degree_days = epw.degree_days()
+    lines = [
+        (
+            f"{epw_file}: {location.city}, {location.state_province_region}, "
+            f"{location.country} ({location.latitude:g}, {location.longitude:g}, "
+            f"UTC{location.timezone:+g}, {location.elevation:g} m), "
+            f"{len(epw.records)} records"
+        ),
+        (
+            f"{'month':>7} {'tdb_mean':>9} {'tdb_min':>9} {'tdb_max':>9} "
+            f"{'rh_mean':>9} {'ghi_kwh':>9} {'hdd_18':>9} {'cdd_18':>9}"
+        ),
+    ]
+    for idx in range(len(means)):
+        lines.append(
+            f"{means['year'][idx]:4d}-{means['month'][idx]:02d} "
+            f"{means['dry_bulb_temperature'][idx]:9.1f} "
+            f"{mins['dry_bulb_temperature'][idx]:9.1f} "
+            f"{maxs['dry_bulb_temperature'][idx]:9.1f} "
+            f"{means['relative_humidity'][idx]:9.1f} "
+            f"{sums['global_horizontal_radiation'][idx] / 1000:9.1f} "
+            f"{degree_days['heating_degree_days'][idx]:9.1f} "
+            f"{degree_days['cooling_degree_days'][idx]:9.1f}"
+        )
+    return True, "\n".join(lines), None
+
+
+def _validate(epw_file: str) -> _TaskResult:
+    epw = EPW.from_epw(epw_file)
+    validation = epw.validate()
+    num_missing = sum(validation.counts("missing").values())
+    if validation.valid:
+        return (
+            True,
+            f"{epw_file}: ok, {len(epw.records)} records, {num_missing} missing values",
+            None,
+        )
+    invalid_counts = ", ".join(
+        f"{field_name} {count}"
+        for field_name, count in validation.counts("invalid").items()
+        if count
+    )
+    return (
+        False,
+        f"{epw_file}: invalid, {len(validation.rows())} records, {invalid_counts}",
+        None,
+    )
+
+
+def _headers(epw_file: str) -> _TaskResult:
+    # by the header lines only, the data records are never read
+    headers = EPW.read_header(epw_file)
+    header_dicts = {
+        header_name: {
+            metafield_name: _jsonable(getattr(header, metafield_name))
+            for metafield_name in header.metafields
+        }
+        | (
+            {"records": _jsonable(header.records)}
+            if "fields" in header.__class__.__dict__
+            else {}
+        )
+        for header_name, header in headers.items()
+    }
+    return True, json.dumps({"file": epw_file} | header_dicts), None
+
+
+def _jsonable(value: AnyField | tuple) -> object:
+    if isinstance(value, tuple):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, float) and math.isnan(value):
+        return None  # NOTE: nan is no valid json
+    return value
+
+
+def _convert(epw_file: str, to: str, output_dir: str | None) -> _TaskResult:
+    path, member = _split_zip(epw_file)
+    file_name = path.name if member is None else Path(member).name
+    stem = next(
+        (
+            file_name[: -len(suffix)]
+            for suffix in _EPW_SUFFIXES + _TABLE_SUFFIXES
+            if file_name.lower().endswith(suffix)
+        ),
+        file_name,
+    )
+    output_file = Path(path.parent if output_dir is None else output_dir) / (
+        f"{stem}.{to}"
+    )
+    if (member is None) and (output_file.resolve() == path.resolve()):
+        raise ValueError(f"cannot convert into the input file: '{epw_file}'.")
+
+    epw = (
+        _read_table(path)
+        if (member is None) and file_name.lower().endswith(_TABLE_SUFFIXES)
+        else EPW.from_epw(epw_file)
+    )
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    if f".{to}" in _EPW_SUFFIXES:
+        epw.to_epw(output_file)
+    else:
+        _write_table(epw, output_file)
+    return True, f"{epw_file} -> {output_file}", None
+
+
+def _write_table(epw: EPW, table_file: Path) -> None:
+    header_lines = json.dumps(
+        [getattr(epw, header_name)._to_epw_line() for header_name in epw.metafields]
+    )
+    if table_file.suffix == ".csv":
+        with open(table_file, "w", newline="") as fp:
+            fp.write(f"#{header_lines}\n")
+            epw.records.to_pandas().to_csv(fp, index=False)
+    elif table_file.suffix == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("pyarrow is required for parquet.") from e
+
+        table = epw.records.to_arrow()
+        pq.write_table(
+            table.replace_schema_metadata({_HEADERS_KEY: header_lines}), table_file
+        )
+    else:  # NOTE: uncompressed and without pickles, strings as unicode arrays
+        np.savez(
+            table_file,
+            **{
+                field_name: column.astype(str) if column.dtype.kind == "O" else column
+                for field_name, column in epw.records.columns.items()
+            },
+            **{_HEADERS_KEY: np.array(header_lines)},
+        )
+
+
+def _read_table(table_file: Path) -> EPW:
+    suffix = table_file.suffix.lower()
+    if suffix == ".csv":
+        pd = _import_pandas()
+        with open(table_file, newline="") as fp:
+            header_lines = json.loads(fp.readline().removeprefix("#"))
+            records_df = pd.read_csv(
+                fp,
+                dtype={
+                    field_name: _NUMPY_DTYPES[field_type]
+                    for field_name, field_type in EPW.fields.items()
+                },
+                keep_default_na=False,
+                na_values={
+                    field_name: ("",)
+                    for field_name, field_type in EPW.fields.items()
+                    if field_type is float
+                },
+                float_precision="round_trip",
+            )
+        columns = {
+            field_name: records_df[field_name].to_numpy() for field_name in EPW.fields
+        }
+    elif suffix == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("pyarrow is required for parquet.") from e
+
+        table = pq.read_table(table_file)
+        header_lines = json.loads(table.schema.metadata[_HEADERS_KEY.encode()])
+        columns = {
+            field_name: table.column(field_name).to_numpy() for field_name in EPW.fields
+        }
+    else:
+        with np.load(table_file, allow_pickle=False) as npz:
+            header_lines = json.loads(npz[_HEADERS_KEY].item())
+            columns = {
+                field_name: (
+                    npz[field_name].astype(object)
+                    if npz[field_name].dtype.kind == "U"
+                    else npz[field_name]
+                )
+                for field_name in EPW.fields
+            }
+
+    return EPW(
+        **{
+            header_name: header_cls._from_epw_line(header_line)
+            for (header_name, header_cls), header_line in zip(
+                EPW.metafields.items(), header_lines, strict=True
+            )
+        },
+        records=EPW._astype_records(rectable(columns), EPW._select_dtypes(None, None)),
+    )
@@ -0,0 +1,189 @@
+import json
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+
+from ._io import _EPW_SUFFIXES
+from ._tools import AnyStrPath
+from .epw import EPW, _Location
+
+_INDEX_VERSION = 1
+_EARTH_RADIUS = 6371.0088  # km, mean
+
+
+class EPWCollection:
+    # metadata index of the location headers under a directory tree, persisted as json
+    __slots__ = ("root_dir", "index_file", "_entries", "_arrays")
+
+    def __init__(
+        self, root_dir: AnyStrPath, index_file: AnyStrPath | None = None
+    ) -> None:
+        self.root_dir = Path(root_dir)
+        self.index_file = Path(
+            self.root_dir / ".epw_index.json" if index_file is None else index_file
+        )
+        self._entries: dict[str, dict] = {}
+        try:
+            with open(self.index_file) as fp:
+                index = json.load(fp)
+            if index["version"] == _INDEX_VERSION:
+                self._entries = index["entries"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+        self._load_arrays()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}: {self.root_dir}, {len(self)} files>"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Path]:
+        return (self.root_dir / epw_file for epw_file in self._entries)
+
+    def update(self) -> None:
+        # only new or changed files are read, by their headers only
+        entries = {}
+        for dir_path, _, file_names in os.walk(self.root_dir):
+            for file_name in file_names:
+                if not file_name.lower().endswith(_EPW_SUFFIXES):  # also compressed
+                    continue
+                epw_path = Path(dir_path) / file_name
+                epw_file = epw_path.relative_to(self.root_dir).as_posix()
+                epw_stat = epw_path.stat()
+                entry = self._entries.get(epw_file)
+                if (
+                    (entry is None)
+                    or (entry["mtime_ns"] != epw_stat.st_mtime_ns)
+                    or (entry["size"] != epw_stat.st_size)
+                ):
+                    try:
+                        location = EPW.read_header(epw_path)["location"]
+                    except (OSError, ValueError, StopIteration):  # not a valid epw
+                        continue
+                    entry = {
+                        "mtime_ns": epw_stat.st_mtime_ns,
+                        "size": epw_stat.st_size,
+                    } | {
+                        metafield_name: getattr(location, metafield_name)
+                        for metafield_name in location.metafields
+                    }
+                entries[epw_file] = entry
+
+        self._entries = entries
+        self._load_arrays()
+        tmp_file = self.index_file.with_name(self.index_file.name + ".tmp")
+        with open(tmp_file, "w") as fp:
+            json.dump({"version": _INDEX_VERSION, "entries": entries}, fp)
+        os.replace(tmp_file, self.index_file)
+
+    def location(self, epw_file: AnyStrPath) -> _Location:  # type: ignore[valid-type] # python/mypy#6063
+        entry = self._entries[self._relative(epw_file)]
+        return _Location(
+            **{
+                metafield_name: entry[metafield_name]
+                for metafield_name in _Location.metafields  # type: ignore[attr-defined] # python/mypy#6063
+            }
+        )
+
+    def filter(
+        self,
+        *,
+        country: str | None = None,
+        source: str | None = None,
+        wmo: str | None = None,
+    ) -> list[Path]:
+        return [
+            self.root_dir / epw_file
+            for epw_file in self._arrays["epw_file"][
+                self._mask(country=country, source=source, wmo=wmo)
+            ]
+        ]
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int = 1,
+        *,
+        elevation: float | None = None,
+        max_elevation_difference: float | None = None,
+        country: str | None = None,
+        source: str | None = None,
+        wmo: str | None = None,
+    ) -> list[tuple[Path, float]]:
+        # great-circle distances in km, vectorised over all indexed stations
+        if k < 1:
+            raise ValueError(f"invalid k: '{k}'.")
+        mask = self._mask(country=country, source=source, wmo=wmo)
+        if max_elevation_difference is not None:
+            if elevation is None:
+                raise ValueError("elevation is required with max_elevation_difference.")
+            mask &= (
+                np.abs(self._arrays["elevation"] - elevation)
+                <= max_elevation_difference
+            )
+        candidate_idxs = np.flatnonzero(mask)
+        chord_lengths = np.linalg.norm(
+            self._arrays["xyz"][candidate_idxs] - _to_xyz(latitude, longitude), axis=1
+        )
+        distances = 2 * _EARTH_RADIUS * np.arcsin(np.clip(chord_lengths / 2, 0, 1))
+        if k < len(distances):
+            nearest_idxs = np.argpartition(distances, k)[:k]
+        else:
+            nearest_idxs = np.arange(len(distances))
+        nearest_idxs = nearest_idxs[np.argsort(distances[nearest_idxs], kind="stable")]
+        return [
+            (
+                self.root_dir / self._arrays["epw_file"][candidate_idxs[idx]],
+                distances[idx].item(),
+            )
+            for idx in nearest_idxs.tolist()
+        ]
+
+    def load(self, epw_file: AnyStrPath, **kwargs) -> EPW:
+        return EPW.from_epw(self.root_dir / self._relative(epw_file), **kwargs)
+
+    def _relative(self, epw_file: AnyStrPath) -> str:
+        try:
+            return Path(epw_file).relative_to(self.root_dir).as_posix()
+        except ValueError:  # already relative to the root directory
+            return Path(epw_file).as_posix()
+
+    def _load_arrays(self) -> None:
+        entries = self._entries.values()
+        self._arrays = {
+            "epw_file": np.array(tuple(self._entries.keys()), dtype=object),
+            "country": np.array([entry["country"] for entry in entries], dtype=object),
+            "source": np.array([entry["source"] for entry in entries], dtype=object),
+            "wmo": np.array([entry["wmo"] for entry in entries], dtype=object),
+            "elevation": np.array(
+                [entry["elevation"] for entry in entries], dtype=np.float64
+            ),
+            "xyz": _to_xyz(
+                np.array([entry["latitude"] for entry in entries], dtype=np.float64),
+                np.array([entry["longitude"] for entry in entries], dtype=np.float64),
+            ).reshape(-1, 3),
+        }
+
+    def _mask(self, **criteria: str | None) -> np.ndarray:
+        mask = np.ones(len(self), dtype=bool)
+        for metafield_name, metafield_val in criteria.items():
+            if metafield_val is not None:
+                mask &= self._arrays[metafield_name] == metafield_val
+        return mask
+
+
+def _to_xyz(latitude, longitude) -> np.ndarray:
+    # unit vectors, so that chord lengths are monotonic in great-circle distances
+    latitude, longitude = np.radians(latitude), np.radians(longitude)
+    return np.stack(
+        (
+            np.cos(latitude) * np.cos(longitude),
+            np.cos(latitude) * np.sin(longitude),
+            np.sin(latitude),
+        ),
+        axis=-1,
+    )
@@ -0,0 +1,130 @@
+import hashlib
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+
+from ._tools import rectable
+
+_FINGERPRINT_VERSION = 1
+
+
+@dataclass(frozen=True, slots=True)
+class EPWDiff:
+    # what differs from self to other, row ranges as (start, stop) over the rows both
+    # have in common
+    headers: tuple[str, ...]  # header names
+    fields: dict[str, tuple[tuple[int, int], ...]]  # field name: changed row ranges
+    missing_fields: tuple[str, ...]  # loaded in one of both only
+    num_rows: tuple[int, int]
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__}: {len(self.headers)} headers, "
+            f"{len(self.fields)} fields, {self.num_changed_rows} rows>"
+        )
+
+    @property
+    def identical(self) -> bool:
+        return not (
+            self.headers
+            or self.fields
+            or self.missing_fields
+            or (self.num_rows[0] != self.num_rows[1])
+        )
+
+    @property
+    def num_changed_rows(self) -> int:
+        # rows with any changed field
+        changed = np.zeros(min(self.num_rows), dtype=bool)
+        for row_ranges in self.fields.values():
+            for start, stop in row_ranges:
+                changed[start:stop] = True
+        return np.count_nonzero(changed)
+
+
+def _diff(
+    header_lines: Iterable[tuple[str, str, str]],
+    records: rectable,
+    other_records: rectable,
+    rtol: float,
+    atol: float,
+) -> EPWDiff:
+    # column-wise, one comparison pass per field and no row is ever assembled
+    num_rows = min(len(records), len(other_records))
+    fields = {}
+    for field_name, column in records.columns.items():
+        if field_name not in other_records.columns:
+            continue
+        other_column = other_records[field_name]
+        if _same_buffer(column, other_column):  # e.g. unchanged columns of morph
+            continue
+        changed = _changed_mask(column[:num_rows], other_column[:num_rows], rtol, atol)
+        if changed.any():
+            fields[field_name] = _row_ranges(changed)
+    return EPWDiff(
+        tuple(
+            header_name
+            for header_name, header_line, other_header_line in header_lines
+            if header_line != other_header_line
+        ),
+        fields,
+        tuple(
+            field_name
+            for field_name in (*records.field_names, *other_records.field_names)
+            if (field_name not in records.columns)
+            or (field_name not in other_records.columns)
+        ),
+        (len(records), len(other_records)),
+    )
+
+
+def _same_buffer(column: np.ndarray, other_column: np.ndarray) -> bool:
+    return (
+        (column.__array_interface__["data"] == other_column.__array_interface__["data"])
+        and (column.shape == other_column.shape)
+        and (column.strides == other_column.strides)
+        and (column.dtype == other_column.dtype)
+    )
+
+
+def _changed_mask(
+    column: np.ndarray, other_column: np.ndarray, rtol: float, atol: float
+) -> np.ndarray:
+    if (column.dtype.kind == "O") or (other_column.dtype.kind == "O"):
+        return column != other_column
+    if rtol or atol:
+        return ~np.isclose(column, other_column, rtol=rtol, atol=atol, equal_nan=True)
+    changed = column != other_column
+    if (column.dtype.kind == "f") and (other_column.dtype.kind == "f"):
+        changed &= ~(np.isnan(column) & np.isnan(other_column))
+    return changed
+
+
+def _row_ranges(changed: np.ndarray) -> tuple[tuple[int, int], ...]:
+    # runs of consecutive changed rows
+    row_idxs = np.flatnonzero(changed)
+    run_ends = np.flatnonzero(np.diff(row_idxs) > 1)
+    starts = row_idxs[np.concatenate(([0], run_ends + 1))]
+    stops = row_idxs[np.concatenate((run_ends, [len(row_idxs) - 1]))] + 1
+    return tuple(zip(starts.tolist(), stops.tolist(), strict=True))
+
+
+def _fingerprint_records(records: rectable) -> bytes:
+    # over canonical values: little-endian int64 and float64, one nan, no -0.0, so
+    # that it does not depend on the platform nor on narrower integer dtypes
+    digest = hashlib.blake2b(
+        f"{_FINGERPRINT_VERSION}|{len(records)}".encode(), digest_size=16
+    )
+    for field_name, column in records.columns.items():
+        kind = "i" if column.dtype.kind == "u" else column.dtype.kind
+        digest.update(f"|{field_name}:{kind}|".encode())
+        if kind == "i":
+            digest.update(column.astype("<i8").tobytes())
+        elif column.dtype.kind == "f":
+            canonical = column.astype("<f8") + 0.0  # -0.0 as 0.0
+            canonical[np.isnan(canonical)] = np.nan
+            digest.update(canonical.tobytes())
+        else:  # NOTE: epw strings never contain a newline
+            digest.update("\n".join(map(str, column.tolist())).encode())
+    return digest.digest()
@@ -1,3 +1,5 @@
+from math import inf
+
 from ._tools import AnyFieldSchema
 
 _EPW_SCHEMA: dict[str, dict[str, AnyFieldSchema]] = {
@@ -126,3 +128,81 @@ _EPW_HEADER_NAMES: dict[str, str] = {
     "comments_2": "COMMENTS 2",
     "data_periods": "DATA PERIODS",
 }
+
+# numpy dtypes of the compact mode, see 'dtypes' of EPW.from_epw
+_EPW_COMPACT_DTYPES: dict[str, str] = {
+    field_name: {float: "float32", str: "object"}.get(field_type, "int16")
+    for field_name, field_type in _EPW_SCHEMA["data"]["fields"].items()
+} | {
+    "month": "int8",
+    "day": "int8",
+    "hour": "int8",
+    "minute": "int8",
+    "present_weather_observation": "int8",
+}
+
+# valid ranges (inclusive) and missing values of the data fields, as in the weather
+# data format definition of the EnergyPlus auxiliary programs
+_EPW_DATA_RANGES: dict[str, tuple[float, float]] = {
+    "month": (1, 12),
+    "day": (1, 31),
+    "hour": (1, 24),
+    "minute": (0, 60),
+    "dry_bulb_temperature": (-70, 70),
+    "dew_point_temperature": (-70, 70),
+    "relative_humidity": (0, 110),
+    "atmospheric_station_pressure": (31000, 120000),
+    "extraterrestrial_horizontal_radiation": (0, inf),
+    "extraterrestrial_direct_normal_radiation": (0, inf),
+    "horizontal_infrared_radiation_intensity": (0, inf),
+    "global_horizontal_radiation": (0, inf),
+    "direct_normal_radiation": (0, inf),
+    "diffuse_horizontal_radiation": (0, inf),
+    "global_horizontal_illuminance": (0, inf),
+    "direct_normal_illuminance": (0, inf),
+    "diffuse_horizontal_illuminance": (0, inf),
+    "zenith_luminance": (0, inf),
+    "wind_direction": (0, 360),
+    "wind_speed": (0, 40),
+    "total_sky_cover": (0, 10),
+    "opaque_sky_cover": (0, 10),
+    "visibility": (0, inf),
+    "ceiling_height": (0, inf),
+    "present_weather_observation": (0, 9),
+    "precipitable_water": (0, inf),
+    "aerosol_optical_depth": (0, inf),
+    "snow_depth": (0, inf),
+    "days_since_last_snowfall": (0, inf),
+    "albedo": (0, inf),
+    "liquid_precipitation_depth": (0, inf),
+    "liquid_precipitation_quantity": (0, inf),
+}
+_EPW_MISSING_VALUES: dict[str, float] = {
+    "dry_bulb_temperature": 99.9,
+    "dew_point_temperature": 99.9,
+    "relative_humidity": 999,
+    "atmospheric_station_pressure": 999999,
+    "extraterrestrial_horizontal_radiation": 9999,
+    "extraterrestrial_direct_normal_radiation": 9999,
+    "horizontal_infrared_radiation_intensity": 9999,
+    "global_horizontal_radiation": 9999,
+    "direct_normal_radiation": 9999,
+    "diffuse_horizontal_radiation": 9999,
+    "global_horizontal_illuminance": 999999,
+    "direct_normal_illuminance": 999999,
+    "diffuse_horizontal_illuminance": 999999,
+    "zenith_luminance": 9999,
+    "wind_direction": 999,
+    "wind_speed": 999,
+    "total_sky_cover": 99,
+    "opaque_sky_cover": 99,
+    "visibility": 9999,
+    "ceiling_height": 99999,
+    "precipitable_water": 999,
+    "aerosol_optical_depth": 0.999,
+    "snow_depth": 999,
+    "days_since_last_snowfall": 99,
+    "albedo": 999,
+    "liquid_precipitation_depth": 999,
+    "liquid_precipitation_quantity": 99,
+}
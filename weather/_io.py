@@ -0,0 +1,78 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import zipfile
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Literal, TextIO
+
+from ._tools import AnyStrPath
+
+_ZIP_PREFIX = "zip://"
+# stream (de)compression by file suffix, NOTE: gzip at zlib's default level, not 9
+_OPENERS: dict[str, Callable[..., TextIO]] = {
+    ".gz": partial(gzip.open, compresslevel=6),
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+_EPW_SUFFIXES = (".epw", *(f".epw{suffix}" for suffix in _OPENERS))
+
+
+def _split_zip(epw_file: AnyStrPath) -> tuple[Path, str | None]:
+    # 'zip://member::archive.zip' as in fsspec, else a plain or compressed file
+    epw_file = os.fspath(epw_file)
+    if not epw_file.startswith(_ZIP_PREFIX):
+        return Path(epw_file), None
+    member, sep, archive_file = epw_file.removeprefix(_ZIP_PREFIX).partition("::")
+    if not (member and sep and archive_file):
+        raise ValueError(f"invalid zip source: '{epw_file}'.")
+    return Path(archive_file), member
+
+
+@contextmanager
+def _open_epw(
+    epw_file: AnyStrPath,
+    mode: Literal["r", "w"] = "r",
+    buffering: int = -1,
+    newline: str | None = None,
+) -> Iterator[TextIO]:
+    # decompressed as a stream, nothing is extracted to disk
+    path, member = _split_zip(epw_file)
+    if member is not None:
+        if mode != "r":
+            raise ValueError(f"cannot write into a zip archive: '{epw_file}'.")
+        with zipfile.ZipFile(path) as archive:
+            try:
+                member_fp = archive.open(member)
+            except KeyError as e:
+                raise FileNotFoundError(f"no such zip member: '{epw_file}'.") from e
+            with member_fp, io.TextIOWrapper(member_fp, newline=newline) as fp:
+                yield fp
+        return
+
+    opener = _OPENERS.get(path.suffix.lower())
+    if opener is None:
+        with open(path, mode, buffering=buffering, newline=newline) as fp:
+            yield fp
+    else:
+        with opener(path, mode + "t", newline=newline) as fp:
+            yield fp
+
+
+def _is_seekable(epw_file: AnyStrPath) -> bool:
+    # plain files only, whose byte offsets are those of the text
+    path, member = _split_zip(epw_file)
+    return (member is None) and (path.suffix.lower() not in _OPENERS)
+
+
+def _source_size(epw_file: AnyStrPath) -> int:
+    # bytes on disk, i.e. compressed
+    path, member = _split_zip(epw_file)
+    if member is None:
+        return path.stat().st_size
+    with zipfile.ZipFile(path) as archive:
+        return archive.getinfo(member).compress_size
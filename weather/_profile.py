@@ -0,0 +1,152 @@
+import logging
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Literal, Self
+
+from ._tools import T
+
+# the profilers entered in the current context, nested ones included
+_profilers: ContextVar[tuple["EPWProfiler", ...]] = ContextVar("_profilers", default=())
+_END = object()
+
+
+class EPWProfiler:
+    # opt-in timers and counters of the load and dump stages, collected while entered;
+    # when no profiler is entered, every hook reduces to one context variable lookup
+    __slots__ = (
+        "_started_tracing",
+        "_token",
+        "callback",
+        "counters",
+        "logger",
+        "peak_memory",
+        "timings",
+        "trace_memory",
+    )
+
+    def __init__(
+        self,
+        callback: Callable[[Literal["timing", "count"], str, float], object]
+        | None = None,
+        *,
+        logger: logging.Logger | None = None,
+        trace_memory: bool = False,
+    ) -> None:
+        self.callback = callback
+        self.logger = logger
+        self.trace_memory = trace_memory
+        self.timings: dict[str, tuple[int, float]] = {}  # stage: (calls, seconds)
+        self.counters: dict[str, int] = {}
+        self.peak_memory: dict[str, int] = {}  # stage: bytes, with trace_memory
+        self._started_tracing = False
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}: {len(self.timings)} stages, {len(self.counters)} counters>"
+
+    def __enter__(self) -> Self:
+        self._token = _profilers.set(_profilers.get() + (self,))
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _profilers.reset(self._token)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def summary(self) -> str:
+        return "\n".join(
+            [
+                f"{stage_name:>24} {num_calls:6d} calls {seconds * 1e3:10.2f} ms"
+                + (
+                    f" {self.peak_memory[stage_name] / 2**20:10.2f} MiB"
+                    if stage_name in self.peak_memory
+                    else ""
+                )
+                for stage_name, (num_calls, seconds) in self.timings.items()
+            ]
+            + [
+                f"{counter_name:>24} {count:16d}"
+                for counter_name, count in self.counters.items()
+            ]
+        )
+
+    def _add_timing(
+        self, stage_name: str, seconds: float, peak_memory: int | None
+    ) -> None:
+        num_calls, total_seconds = self.timings.get(stage_name, (0, 0.0))
+        self.timings[stage_name] = (num_calls + 1, total_seconds + seconds)
+        if peak_memory is not None:
+            self.peak_memory[stage_name] = max(
+                self.peak_memory.get(stage_name, 0), peak_memory
+            )
+        self._emit("timing", stage_name, seconds)
+
+    def _add_count(self, counter_name: str, count: int) -> None:
+        self.counters[counter_name] = self.counters.get(counter_name, 0) + count
+        self._emit("count", counter_name, count)
+
+    def _emit(self, kind: Literal["timing", "count"], name: str, value: float) -> None:
+        if self.callback is not None:
+            self.callback(kind, name, value)
+        if self.logger is not None:
+            self.logger.debug("%s %s: %s", kind, name, value)
+
+
+def _profiling() -> bool:
+    # for counts that are costly to compute, so only when profiling
+    return bool(_profilers.get())
+
+
+@contextmanager
+def _stage(stage_name: str) -> Iterator[None]:
+    # NOTE: tracemalloc has one peak, so the peak of a stage enclosing other stages
+    # only covers its allocations after the last of them started
+    profilers = _profilers.get()
+    if not profilers:
+        yield
+        return
+    trace_memory = tracemalloc.is_tracing() and any(
+        profiler.trace_memory for profiler in profilers
+    )
+    if trace_memory:
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        for profiler in profilers:
+            profiler._add_timing(stage_name, seconds, peak_memory)
+
+
+def _stage_iter(stage_name: str, iterable: Iterable[T]) -> Iterator[T]:
+    # times the production of each item, not the consumer's work in between,
+    # and without memory peaks as the consumer's allocations would interleave
+    iterator = iter(iterable)
+    if not (profilers := _profilers.get()):
+        return iterator
+
+    def _timed_iter() -> Iterator[T]:
+        while True:
+            start = time.perf_counter()
+            item = next(iterator, _END)
+            if item is _END:
+                return
+            seconds = time.perf_counter() - start
+            for profiler in profilers:
+                profiler._add_timing(stage_name, seconds, None)
+            yield item  # type: ignore[misc]
+
+    return _timed_iter()
+
+
+def _count(counter_name: str, count: int) -> None:
+    for profiler in _profilers.get():
+        profiler._add_count(counter_name, count)
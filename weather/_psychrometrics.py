@@ -0,0 +1,125 @@
+from collections.abc import Callable
+
+import numpy as np
+
+# SI units, after the ASHRAE Handbook - Fundamentals (2017), chapter 1
+_WATER_AIR_MOLAR_MASS_RATIO = 0.621945
+_DRY_AIR_GAS_CONSTANT = 287.042  # J/(kg K)
+_WET_BULB_ITERATIONS = 40  # bisection, to well below 1e-6 K
+
+
+def _saturation_pressure(temperature: np.ndarray) -> np.ndarray:
+    # Pa, Hyland-Wexler over ice below 0 °C and over liquid water above
+    t = np.asarray(temperature, dtype=np.float64) + 273.15
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(
+            t < 273.15,
+            np.exp(
+                -5.6745359e03 / t
+                + 6.3925247
+                - 9.6778430e-03 * t
+                + 6.2215701e-07 * t**2
+                + 2.0747825e-09 * t**3
+                - 9.4840240e-13 * t**4
+                + 4.1635019 * np.log(t)
+            ),
+            np.exp(
+                -5.8002206e03 / t
+                + 1.3914993
+                - 4.8640239e-02 * t
+                + 4.1764768e-05 * t**2
+                - 1.4452093e-08 * t**3
+                + 6.5459673 * np.log(t)
+            ),
+        )
+
+
+def _humidity_ratio_of(vapor_pressure: np.ndarray, pressure: np.ndarray) -> np.ndarray:
+    return _WATER_AIR_MOLAR_MASS_RATIO * vapor_pressure / (pressure - vapor_pressure)
+
+
+def humidity_ratio(
+    dew_point_temperature: np.ndarray, atmospheric_station_pressure: np.ndarray
+) -> np.ndarray:
+    # kg water / kg dry air
+    return _humidity_ratio_of(
+        _saturation_pressure(dew_point_temperature), atmospheric_station_pressure
+    )
+
+
+def enthalpy(
+    dry_bulb_temperature: np.ndarray, humidity_ratio: np.ndarray
+) -> np.ndarray:
+    # J / kg dry air
+    return 1006.0 * dry_bulb_temperature + humidity_ratio * (
+        2501000.0 + 1860.0 * dry_bulb_temperature
+    )
+
+
+def air_density(
+    dry_bulb_temperature: np.ndarray,
+    humidity_ratio: np.ndarray,
+    atmospheric_station_pressure: np.ndarray,
+) -> np.ndarray:
+    # kg moist air / m3
+    return (
+        atmospheric_station_pressure
+        * (1.0 + humidity_ratio)
+        / (
+            _DRY_AIR_GAS_CONSTANT
+            * (dry_bulb_temperature + 273.15)
+            * (1.0 + humidity_ratio / _WATER_AIR_MOLAR_MASS_RATIO)
+        )
+    )
+
+
+def wet_bulb_temperature(
+    dry_bulb_temperature: np.ndarray,
+    dew_point_temperature: np.ndarray,
+    humidity_ratio: np.ndarray,
+    atmospheric_station_pressure: np.ndarray,
+) -> np.ndarray:
+    # °C, the thermodynamic wet bulb, bisected between dew point and dry bulb for all
+    # rows at once instead of iterating per row
+    dry_bulb = np.asarray(dry_bulb_temperature, dtype=np.float64)
+    lower = np.minimum(dew_point_temperature, dry_bulb).astype(np.float64)
+    upper = dry_bulb.copy()
+    for _ in range(_WET_BULB_ITERATIONS):
+        wet_bulb = (lower + upper) / 2
+        saturated = _humidity_ratio_of(
+            _saturation_pressure(wet_bulb), atmospheric_station_pressure
+        )
+        wet_bulb_humidity_ratio = np.where(
+            wet_bulb >= 0,
+            ((2501.0 - 2.326 * wet_bulb) * saturated - 1.006 * (dry_bulb - wet_bulb))
+            / (2501.0 + 1.86 * dry_bulb - 4.186 * wet_bulb),
+            ((2830.0 - 0.24 * wet_bulb) * saturated - 1.006 * (dry_bulb - wet_bulb))
+            / (2830.0 + 1.86 * dry_bulb - 2.1 * wet_bulb),
+        )
+        too_humid = wet_bulb_humidity_ratio > humidity_ratio
+        upper = np.where(too_humid, wet_bulb, upper)
+        lower = np.where(too_humid, lower, wet_bulb)
+    return (lower + upper) / 2
+
+
+# name: (input fields, derived fields included, function of the inputs)
+_PSYCHROMETRIC_FIELDS: dict[str, tuple[tuple[str, ...], Callable[..., np.ndarray]]] = {
+    "humidity_ratio": (
+        ("dew_point_temperature", "atmospheric_station_pressure"),
+        humidity_ratio,
+    ),
+    "enthalpy": (("dry_bulb_temperature", "humidity_ratio"), enthalpy),
+    "air_density": (
+        ("dry_bulb_temperature", "humidity_ratio", "atmospheric_station_pressure"),
+        air_density,
+    ),
+    "wet_bulb_temperature": (
+        (
+            "dry_bulb_temperature",
+            "dew_point_temperature",
+            "humidity_ratio",
+            "atmospheric_station_pressure",
+        ),
+        wet_bulb_temperature,
+    ),
+}
@@ -1,28 +1,308 @@
+import html
 import sys
+from collections.abc import Callable, Hashable, Iterable, Iterator, Mapping, Sequence
+from datetime import datetime
+from functools import cache
+from itertools import chain
 from os import PathLike
+from typing import TYPE_CHECKING, Any, TypeVar, overload
 
-import pandas as pd
+import numpy as np
+from numpy.typing import ArrayLike, DTypeLike
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 AnyStrPath = str | PathLike[str]
+AnyDatetime = str | datetime | np.datetime64
 AnyFieldSchema = dict[str, type]
+AnyDTypes = Mapping[str, DTypeLike]
 AnyField = int | float | str
 AnyRecords = tuple[tuple[AnyField, ...], ...]  # NOTE: the 1st tuple refers to rectuple
+T = TypeVar("T")
+
+_NUMPY_DTYPES: dict[type, np.dtype] = {
+    int: np.dtype(np.int64),
+    float: np.dtype(np.float64),
+    str: np.dtype(object),
+}
 
-rectuple = (  # noqa: E731
+rectuple = cache(  # one type per name and field names, not one per load
     lambda type_name, field_names: type(
         sys.intern(type_name),
         (tuple,),
         {
-            "to_pandas": lambda self: pd.DataFrame(self, columns=self.field_names),
+            "to_pandas": lambda self: _import_pandas().DataFrame(
+                self, columns=self.field_names
+            ),
             "__str__": lambda self: tuple(self).__str__(),  # return a tuple-like string
             "__repr__": lambda self: self.to_pandas().__repr__(),  # return a pandas-like representation
             "_repr_html_": lambda self: self.to_pandas()._repr_html_(),  # return a pandas-like representation in Jupyter Notebook
-            # "__getnewargs__": lambda self: tuple(self),  # used by copy and pickle
-            "field_names": field_names,
+            "__reduce__": lambda self: (  # used by copy and pickle
+                _load_rectuple,
+                (type(self).__name__, self.field_names, tuple(self)),
+            ),
+            "field_names": tuple(field_names),  # NOTE: not dict_keys, for pickle
             # "__match_args__": field_names,
-            # "__module__": sys._getframe(1).f_globals.get(
-            #     "__name__", "__main__"
-            # ),  # used by pickle
         },
     )
 )
+
+
+def _import_pandas():
+    # NOTE: on demand, as pandas takes most of the import time of weather
+    import pandas as pd
+
+    return pd
+
+
+def _astype_column(field_name: str, column: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    if column.dtype == dtype:
+        return column
+    converted = column.astype(dtype)
+    if (dtype.kind in "iu") and not np.array_equal(converted, column):
+        raise ValueError(f"invalid {dtype} values of '{field_name}'.")
+    return converted
+
+
+def _readonly(column: ArrayLike) -> np.ndarray:
+    # NOTE: view to leave the caller's array writeable
+    column = np.asarray(column).view()
+    column.flags.writeable = False
+    return column
+
+
+def _load_rectuple(
+    type_name: str, field_names: tuple[str, ...], records: AnyRecords
+) -> AnyRecords:
+    # the rectuple type is rebuilt on unpickling as it cannot be looked up by name
+    return rectuple(type_name, field_names)(records)
+
+
+class rectable(Sequence[tuple[AnyField, ...]]):  # noqa: N801
+    # columnar counterpart of rectuple: one contiguous read-only array per field,
+    # rows are only assembled on demand
+    __slots__ = ("columns", "dirty", "_cache")
+
+    columns: dict[str, np.ndarray]
+    dirty: dict[str, tuple[int, int]]  # field name: (start, stop) of changed rows
+    _cache: dict[Hashable, tuple[frozenset[str], Any]]
+
+    def __init__(self, columns: Mapping[str, ArrayLike]) -> None:
+        self._cache = {}
+        self.dirty = {}
+        self.columns = {}
+        for field_name, column in columns.items():
+            self.columns[sys.intern(field_name)] = _readonly(column)
+        if len({len(column) for column in self.columns.values()}) > 1:
+            raise ValueError("columns of unequal length.")
+
+    @property
+    def field_names(self) -> tuple[str, ...]:
+        return tuple(self.columns.keys())
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
+
+    @overload
+    def __getitem__(self, key: int) -> tuple[AnyField, ...]: ...
+    @overload
+    def __getitem__(self, key: slice) -> "rectable": ...
+    @overload
+    def __getitem__(self, key: str) -> np.ndarray: ...
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.columns[key]
+        if isinstance(key, slice):  # views, not copies
+            return rectable(
+                {name: column[key] for name, column in self.columns.items()}
+            )
+        return tuple(column.item(key) for column in self.columns.values())
+
+    def __setitem__(self, key: str, column: ArrayLike) -> None:
+        # replaces or adds a column, dropping the memoised values that depend on it;
+        # a new column drops them all, as those over all 'field_names' are stale
+        column = _readonly(column)
+        if self.columns and (len(column) != len(self)):
+            raise ValueError("columns of unequal length.")
+        self._mark_dirty(key, column)
+        is_new = key not in self.columns
+        self.columns[sys.intern(key)] = column
+        self._cache = {
+            cache_key: (depends, value)
+            for cache_key, (depends, value) in self._cache.items()
+            if not (is_new or (key in depends))
+        }
+
+    def replace(self, columns: Mapping[str, ArrayLike]) -> "rectable":
+        # copy-on-write: shares the other columns and the memoised values that
+        # depend on none of the replaced ones, none if a column is added
+        replaced = rectable(self.columns | dict(columns))
+        replaced._cache = (
+            {
+                cache_key: (depends, value)
+                for cache_key, (depends, value) in self._cache.items()
+                if depends.isdisjoint(columns.keys())
+            }
+            if columns.keys() <= self.columns.keys()
+            else {}
+        )
+        replaced.dirty = self.dirty.copy()
+        for field_name in columns.keys():
+            replaced._mark_dirty(field_name, self.columns.get(field_name))
+        return replaced
+
+    def _mark_dirty(self, key: str, column: np.ndarray | None) -> None:
+        # widens the dirty range of 'key' to the rows where 'column' differs from the
+        # current values, nan equal to nan; a new column is dirty as a whole
+        current = self.columns.get(key)
+        if (current is None) or (column is None):
+            changed = np.flatnonzero(np.ones(len(self), dtype=bool))
+        else:
+            changed = np.flatnonzero(
+                (current != column)
+                & ~((current != current) & (column != column))  # nan, also in object
+            )
+        if len(changed) == 0:
+            return
+        start, stop = changed[0].item(), changed[-1].item() + 1
+        if key in self.dirty:
+            start, stop = min(start, self.dirty[key][0]), max(stop, self.dirty[key][1])
+        self.dirty[key] = (start, stop)
+
+    def __iter__(self) -> Iterator[tuple[AnyField, ...]]:
+        return zip(*(column.tolist() for column in self.columns.values()), strict=True)
+
+    def _cached(
+        self, key: Hashable, func: Callable[[], T], depends: Iterable[str]
+    ) -> T:
+        # memoised values derived from the columns in 'depends'
+        if key not in self._cache:
+            self._cache[key] = (frozenset(depends), func())
+        return self._cache[key][1]
+
+    def memory_usage(self) -> dict[str, int]:
+        # bytes per column, counting each distinct object of object columns once
+        return {
+            field_name: column.nbytes
+            + (
+                sum(map(sys.getsizeof, {id(obj): obj for obj in column}.values()))
+                if column.dtype.kind == "O"
+                else 0
+            )
+            for field_name, column in self.columns.items()
+        }
+
+    def __reduce__(self):  # used by copy and pickle, keeps the columns read-only
+        return (rectable, (self.columns,))
+
+    def to_numpy(self) -> np.ndarray:
+        # NOTE: a structured array interleaves the fields, hence always a copy
+        structured = np.empty(
+            len(self),
+            dtype=[
+                (field_name, column.dtype)
+                for field_name, column in self.columns.items()
+            ],
+        )
+        for field_name, column in self.columns.items():
+            structured[field_name] = column
+        return structured
+
+    def to_pandas(self) -> "pd.DataFrame":
+        # not consolidated, no copy
+        return _import_pandas().DataFrame(self.columns, copy=False)
+
+    def to_arrow(self):  # -> pyarrow.Table
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("pyarrow is required for 'to_arrow'.") from e
+
+        return pa.table(
+            {
+                field_name: pa.array(column)  # zero-copy for numeric columns
+                for field_name, column in self.columns.items()
+            }
+        )
+
+    def __str__(self) -> str:
+        return tuple(self).__str__()  # return a tuple-like string
+
+    def __repr__(self) -> str:  # return a pandas-like representation
+        column_names, rows = self._preview()
+        column_widths = tuple(
+            max(map(len, column_cells))
+            for column_cells in zip(column_names, *rows, strict=True)
+        )
+        return "\n".join(
+            chain(
+                (
+                    " ".join(
+                        cell.rjust(width)
+                        for cell, width in zip(cells, column_widths, strict=True)
+                    )
+                    for cells in chain((column_names,), rows)
+                ),
+                (f"\n[{len(self)} rows x {len(self.columns)} columns]",),
+            )
+        )
+
+    def _repr_html_(self) -> str:  # return a pandas-like html in Jupyter Notebook
+        column_names, rows = self._preview()
+        return "".join(
+            chain(
+                ('<table border="1" class="dataframe">', "<thead><tr>"),
+                (f"<th>{html.escape(cell)}</th>" for cell in column_names),
+                ("</tr></thead><tbody>",),
+                (
+                    "".join(
+                        chain(
+                            ("<tr>",),
+                            (f"<td>{html.escape(cell)}</td>" for cell in cells),
+                            ("</tr>",),
+                        )
+                    )
+                    for cells in rows
+                ),
+                (
+                    "</tbody></table>",
+                    f"<p>{len(self)} rows × {len(self.columns)} columns</p>",
+                ),
+            )
+        )
+
+    def _preview(
+        self, max_rows: int = 10, max_cols: int = 8
+    ) -> tuple[tuple[str, ...], list[tuple[str, ...]]]:
+        # head/tail cells only, no full table is materialised
+        num_rows, field_names = len(self), self.field_names
+        row_idxs = (
+            tuple(range(num_rows))
+            if num_rows <= max_rows
+            else (
+                *range(max_rows // 2),
+                None,
+                *range(num_rows - max_rows // 2, num_rows),
+            )
+        )
+        col_names = (
+            field_names
+            if len(field_names) <= max_cols
+            else (*field_names[: max_cols // 2], None, *field_names[-(max_cols // 2) :])
+        )
+        return (
+            ("", *("..." if name is None else name for name in col_names)),
+            [
+                (
+                    "..." if row_idx is None else str(row_idx),
+                    *(
+                        "..."
+                        if (row_idx is None) or (name is None)
+                        else str(self.columns[name].item(row_idx))
+                        for name in col_names
+                    ),
+                )
+                for row_idx in row_idxs
+            ],
+        )
@@ -0,0 +1,94 @@
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
+
+from ._epw_schema import _EPW_DATA_RANGES, _EPW_MISSING_VALUES
+from ._tools import rectable
+
+
+@dataclass(frozen=True, slots=True)
+class EPWValidation:
+    # one bit per checked field of each row, bit i referring to field_names[i]
+    field_names: tuple[str, ...]
+    invalid: np.ndarray  # out of range, and not missing
+    missing: np.ndarray  # missing values, or nan
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__}: {len(self.invalid)} rows, "
+            f"{np.count_nonzero(self.invalid)} invalid, "
+            f"{np.count_nonzero(self.missing)} missing>"
+        )
+
+    @property
+    def valid(self) -> bool:
+        return not self.invalid.any()
+
+    def counts(self, kind: Literal["invalid", "missing"] = "invalid") -> dict[str, int]:
+        return {
+            field_name: np.count_nonzero(self.mask(field_name, kind))
+            for field_name in self.field_names
+        }
+
+    def mask(
+        self, field_name: str, kind: Literal["invalid", "missing"] = "invalid"
+    ) -> np.ndarray:
+        if field_name not in self.field_names:
+            raise ValueError(f"invalid field name: '{field_name}'.")
+        bit = np.uint64(1 << self.field_names.index(field_name))
+        return (self._bits(kind) & bit) != 0
+
+    def rows(self, kind: Literal["invalid", "missing"] = "invalid") -> np.ndarray:
+        # indices of the rows with any invalid (or missing) field
+        return np.flatnonzero(self._bits(kind))
+
+    def _bits(self, kind: str) -> np.ndarray:
+        if kind not in ("invalid", "missing"):
+            raise ValueError(f"invalid kind: '{kind}'.")
+        return self.invalid if kind == "invalid" else self.missing
+
+
+def _validate(records: rectable) -> EPWValidation:
+    # column-wise, one comparison pass per field and no row is ever assembled
+    field_names = tuple(
+        field_name
+        for field_name in records.field_names
+        if (field_name in _EPW_DATA_RANGES) or (field_name in _EPW_MISSING_VALUES)
+    )
+    invalid = np.zeros(len(records), dtype=np.uint64)
+    missing = np.zeros(len(records), dtype=np.uint64)
+    for idx, field_name in enumerate(field_names):
+        column = records[field_name]
+        is_missing = _missing_mask(field_name, column)
+        lower, upper = _EPW_DATA_RANGES.get(field_name, (-np.inf, np.inf))
+        is_invalid = ~is_missing & ((column < lower) | (column > upper))
+        bit = np.uint64(1 << idx)
+        missing[is_missing] |= bit
+        invalid[is_invalid] |= bit
+    return EPWValidation(field_names, invalid, missing)
+
+
+def _missing_mask(field_name: str, column: np.ndarray) -> np.ndarray:
+    # NOTE: exact matches, e.g. a zenith luminance above 9999 is no missing value
+    is_missing = (
+        np.isnan(column)
+        if column.dtype.kind == "f"
+        else np.zeros(len(column), dtype=bool)
+    )
+    if field_name in _EPW_MISSING_VALUES:
+        is_missing |= column == _EPW_MISSING_VALUES[field_name]
+    return is_missing
+
+
+def _missing_as_nan(records: rectable) -> rectable:
+    # float columns only, integer columns keep their missing values
+    columns = dict(records.columns)
+    for field_name, column in columns.items():
+        if (column.dtype.kind == "f") and (field_name in _EPW_MISSING_VALUES):
+            is_missing = column == _EPW_MISSING_VALUES[field_name]
+            if is_missing.any():  # copied only if needed
+                columns[field_name] = np.where(is_missing, np.nan, column).astype(
+                    column.dtype, copy=False
+                )
+    return rectable(columns)
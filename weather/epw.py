@@ -1,16 +1,67 @@
-from collections.abc import Iterable, Iterator
-from dataclasses import dataclass, make_dataclass
-from itertools import chain, islice
-from typing import ClassVar, Self
+import calendar
+import csv
+import hashlib
+import os
+import sys
+import tempfile
+import zipfile
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, make_dataclass, replace
+from datetime import date
+from functools import partial
+from io import BytesIO, StringIO, TextIOWrapper
+from itertools import chain, count, islice, repeat
+from operator import itemgetter
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, ClassVar, Literal, Self, TextIO, overload
+from weakref import WeakKeyDictionary
 
-from ._epw_schema import _EPW_HEADER_NAMES, _EPW_SCHEMA
-from ._tools import AnyField, AnyFieldSchema, AnyRecords, AnyStrPath, rectuple
+import numpy as np
+from numpy.typing import ArrayLike
+
+from ._cache import EPWCache
+from ._diff import EPWDiff, _diff, _fingerprint_records
+from ._epw_schema import _EPW_COMPACT_DTYPES, _EPW_HEADER_NAMES, _EPW_SCHEMA
+from ._io import _is_seekable, _open_epw, _source_size
+from ._profile import _count, _profiling, _stage, _stage_iter
+from ._psychrometrics import _PSYCHROMETRIC_FIELDS
+from ._solar import _solar_position, _TimeGrid
+from ._tools import (
+    _NUMPY_DTYPES,
+    AnyDatetime,
+    AnyDTypes,
+    AnyField,
+    AnyFieldSchema,
+    AnyRecords,
+    AnyStrPath,
+    T,
+    _astype_column,
+    _import_pandas,
+    rectable,
+    rectuple,
+)
+from ._validation import EPWValidation, _missing_as_nan, _validate
+
+if TYPE_CHECKING:  # NOTE: imported on demand, see _import_pandas and _run_in_executor
+    import asyncio
+
+    import pandas as pd
 
 """Terminology
 1. An epw weather file starts with several 'header records', followed by 'data records'.
 """
 
-# TODO: check numbers
+_WRITE_BUFFER_SIZE = 2**20
+_PARALLEL_CHUNK_SIZE = 2**23  # bytes, the minimum worth a worker process
+_ASYNC_MAX_CONCURRENCY = os.cpu_count() or 1
+_async_semaphores: WeakKeyDictionary[
+    "asyncio.AbstractEventLoop", "asyncio.Semaphore"
+] = WeakKeyDictionary()
+_TIME_FIELDS = ("year", "month", "day", "hour", "minute")
+_RESAMPLE_KEYS = {"D": ("year", "month", "day"), "M": ("year", "month")}
+_RESAMPLE_UFUNCS = {"mean": np.add, "sum": np.add, "min": np.fmin, "max": np.fmax}
 
 DATACLASS_PARAMS = {
     "repr": False,
@@ -40,6 +91,12 @@ class _Records:
         ):
             raise AttributeError(f"{name} is no valid field of '{self.name}'.")
 
+        if isinstance(self.records, rectable):
+            if name not in self.records.columns:
+                raise AttributeError(
+                    f"{name} is not loaded, see 'columns' when loading '{self.name}'."
+                )
+            return self.records[name]
         if self.records == ():
             return ()
 
@@ -55,18 +112,31 @@ class _Records:
             raise AttributeError(f"invalid field name: '{name}'")
         return next(islice(zip(*self.records, strict=True), idx, None))
 
+    @staticmethod
+    def _load_epw_field(
+        field_type: type, field_vals: Iterable[str]
+    ) -> Iterator[AnyField]:
+        if field_type is str:  # equal strings share one object, as by the c parser
+            return map(sys.intern, field_vals)
+        return (
+            field_type("nan")
+            if ((field_val == "") and (field_type is float))
+            else field_type(field_val)
+            for field_val in field_vals
+        )
+
     @classmethod
     def _load_epw_records_generic(
         cls, records_iter: Iterator[Iterable[str]]
     ) -> AnyRecords:
-        return rectuple(f"{cls.name}_records", cls.fields.keys())(
+        num_rectuple_types = rectuple.cache_info().currsize
+        records_type = rectuple(f"{cls.name}_records", tuple(cls.fields.keys()))
+        _count("rectuple_types", rectuple.cache_info().currsize - num_rectuple_types)
+        return records_type(
             zip(
                 *(
                     tuple(  # NOTE: this tuple cannot be omited somehow
-                        field_type("nan")
-                        if ((field_val == "") and (field_type is float))
-                        else field_type(field_val)
-                        for field_val in field_vals
+                        cls._load_epw_field(field_type, field_vals)
                     )
                     for field_type, field_vals in zip(
                         cls.fields.values(),
@@ -125,7 +195,8 @@ class _Header(_Records):
                 ),
                 (
                     (self._dump_epw_records(),)
-                    if "fields" in self.__class__.__dict__
+                    if ("fields" in self.__class__.__dict__)
+                    and self.records  # no trailing comma, for round-trip
                     else ()
                 ),
             )
@@ -177,7 +248,7 @@ def _make_header_dataclass(header_name: str) -> type:
         cls_name,
         chain(metafields_schema.items(), records_schema.items()),
         bases=(_Header,),
-        namespace=namespace,
+        namespace=namespace | {"__module__": __name__},  # used by pickle
         **DATACLASS_PARAMS,  # type: ignore[arg-type]
     )
 
@@ -202,7 +273,7 @@ class EPW(_Records):
     comments_1: _Comments1  # type: ignore[valid-type] # python/mypy#6063
     comments_2: _Comments2  # type: ignore[valid-type] # python/mypy#6063
     data_periods: _DataPeriods  # type: ignore[valid-type] # python/mypy#6063
-    records: AnyRecords
+    records: rectable
     name: ClassVar[str] = "epw"
     metafields: ClassVar[AnyFieldSchema] = {
         "location": _Location,
@@ -215,56 +286,1169 @@ class EPW(_Records):
         "data_periods": _DataPeriods,
     }
     fields: ClassVar[AnyFieldSchema] = _EPW_SCHEMA["data"]["fields"]
+    derived_fields: ClassVar[tuple[str, ...]] = tuple(_PSYCHROMETRIC_FIELDS.keys())
+
+    def __getattr__(self, name: str):
+        if name in _PSYCHROMETRIC_FIELDS:
+            return self._load_derived_field(name)
+        return _Records.__getattr__(self, name)  # NOTE: explicit, see DATACLASS_PARAMS
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # copy-on-write: a new 'records' with the column replaced, so that epws sharing
+        # the former ones, e.g. by replace() or morph(), are not changed
+        if name not in self.fields:
+            object.__setattr__(self, name, value)
+            return
+        column = np.asarray(value)
+        if column.ndim == 0:  # a scalar, for every record
+            column = np.full(len(self.records), column, dtype=column.dtype)
+        if (
+            column.dtype.kind
+            not in {int: "iu", float: "iuf", str: "OU"}[self.fields[name]]
+        ):
+            raise ValueError(f"invalid dtype of '{name}': '{column.dtype}'.")
+        if name not in self.records.columns:  # NOTE: would break the schema order
+            raise AttributeError(
+                f"{name} is not loaded, see 'columns' when loading '{self.name}'."
+            )
+        self.records = self.records.replace(
+            {name: _astype_column(name, column, self.records[name].dtype)}
+        )
 
     @classmethod
-    def from_epw(cls, epw_file: AnyStrPath) -> Self:  # type: ignore[valid-type] # python/mypy#11666
-        with open(epw_file) as fp:
-            epw_iter = (line.rstrip() for line in fp.readlines())
-
-        return cls(
-            location=_Location._from_epw_line(next(epw_iter)),  # type: ignore[attr-defined] # python/mypy#6063
-            design_conditions=_DesignConditions._from_epw_line(next(epw_iter)),  # type: ignore[attr-defined] # python/mypy#6063
-            typical_extreme_periods=_TypicalExtremePeriods._from_epw_line(  # type: ignore[attr-defined] # python/mypy#6063
-                next(epw_iter)
+    def from_epw(
+        cls,
+        epw_file: AnyStrPath,
+        *,
+        engine: Literal["c", "python"] = "c",
+        columns: Iterable[str] | None = None,
+        dtypes: Literal["compact"] | AnyDTypes | None = None,
+        missing_as_nan: bool = False,
+        validate: bool = False,
+        cache: EPWCache | None = None,
+        workers: int = 1,
+    ) -> Self:  # type: ignore[valid-type] # python/mypy#11666
+        cls._check_engine(engine)
+        if workers < 1:
+            raise ValueError(f"invalid workers: '{workers}'.")
+        epw = cls._load_epw(
+            epw_file, engine, cls._select_dtypes(columns, dtypes), cache, workers
+        )
+        return epw._check_records(missing_as_nan, validate)
+
+    @classmethod
+    def from_archive(
+        cls,
+        archive_file: AnyStrPath,
+        *,
+        engine: Literal["c", "python"] = "c",
+        columns: Iterable[str] | None = None,
+        dtypes: Literal["compact"] | AnyDTypes | None = None,
+        missing_as_nan: bool = False,
+        validate: bool = False,
+    ) -> Iterator[tuple[str, Self]]:  # type: ignore[valid-type] # python/mypy#11666
+        # all epw members of a zip archive, which is opened only once
+        cls._check_engine(engine)
+        field_dtypes = cls._select_dtypes(columns, dtypes)
+        with zipfile.ZipFile(archive_file) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or not member.filename.lower().endswith(".epw"):
+                    continue
+                _count("files", 1)
+                _count("bytes_read", member.compress_size)
+                with archive.open(member) as member_fp, TextIOWrapper(member_fp) as fp:
+                    epw = cls._load_epw_fp(fp, engine, field_dtypes)
+                yield member.filename, epw._check_records(missing_as_nan, validate)
+
+    @classmethod
+    def _load_epw(
+        cls,
+        epw_file: AnyStrPath,
+        engine: str,
+        field_dtypes: dict[str, np.dtype],
+        cache: EPWCache | None,
+        workers: int = 1,
+    ) -> Self:  # type: ignore[valid-type] # python/mypy#11666
+        if cache is not None:
+            with _stage("cache_key"):
+                cache_key = cache.key(epw_file)
+            with _stage("cache_get"):
+                cached = cache.get(cache_key, field_dtypes.keys())
+            _count("cache_hits" if cached is not None else "cache_misses", 1)
+            if cached is not None:
+                headers, records = cached
+                return cls(
+                    **headers, records=cls._astype_records(records, field_dtypes)
+                )
+            epw = cls._load_epw(  # cache all columns
+                epw_file, engine, cls._select_dtypes(None, None), None, workers
+            )
+            with _stage("cache_put"):
+                cache.put(
+                    cache_key,
+                    {
+                        header_name: getattr(epw, header_name)
+                        for header_name in cls.metafields
+                    },
+                    epw.records,
+                )
+            epw.records = cls._astype_records(epw.records, field_dtypes)
+            return epw
+
+        if _profiling():
+            _count("files", 1)
+            _count("bytes_read", _source_size(epw_file))
+        if (workers > 1) and _is_seekable(epw_file):
+            return cls._load_epw_parallel(epw_file, engine, field_dtypes, workers)
+        with _open_epw(epw_file) as fp:
+            return cls._load_epw_fp(fp, engine, field_dtypes)
+
+    @classmethod
+    def _load_epw_parallel(
+        cls,
+        epw_file: AnyStrPath,
+        engine: str,
+        field_dtypes: dict[str, np.dtype],
+        workers: int,
+    ) -> Self:  # type: ignore[valid-type] # python/mypy#11666
+        # the data records are split at line starts into byte ranges, each parsed by
+        # the serial loaders in a worker process, and the column chunks concatenated
+        headers = cls.read_header(epw_file)
+        with open(epw_file, "rb") as fp:
+            deque(islice(fp, len(cls.metafields)), maxlen=0)  # skip headers
+            data_start = fp.tell()
+            data_end = fp.seek(0, os.SEEK_END)
+            num_chunks = max(
+                1, min(workers, (data_end - data_start) // _PARALLEL_CHUNK_SIZE)
+            )
+            offsets = [data_start]
+            for chunk_idx in range(1, num_chunks):
+                fp.seek(data_start + (data_end - data_start) * chunk_idx // num_chunks)
+                fp.readline()  # to the start of the next line
+                offsets.append(max(fp.tell(), offsets[-1]))
+            offsets.append(data_end)
+
+        with _stage(f"read_records[{engine}]"):
+            if num_chunks == 1:
+                records = _load_epw_chunk(
+                    cls, epw_file, data_start, data_end, engine, field_dtypes
+                )
+            else:
+                with ProcessPoolExecutor(max_workers=num_chunks) as executor:
+                    chunks = tuple(
+                        executor.map(
+                            _load_epw_chunk,
+                            repeat(cls),
+                            repeat(epw_file),
+                            offsets[:-1],
+                            offsets[1:],
+                            repeat(engine),
+                            repeat(field_dtypes),
+                        )
+                    )
+                records = cls._astype_records(_concat_records(chunks), field_dtypes)
+                _count("rows", len(records))
+                _count("cells", len(records) * len(field_dtypes))
+        return cls(**headers, records=records)
+
+    @classmethod
+    def _load_epw_fp(
+        cls, fp: TextIO, engine: str, field_dtypes: dict[str, np.dtype]
+    ) -> Self:  # type: ignore[valid-type] # python/mypy#11666
+        with _stage("read_headers"):  # NOTE: by readline, so that fp.tell() works
+            headers = cls._load_epw_headers(
+                line.rstrip() for line in iter(fp.readline, "")
+            )
+        with _stage(f"read_records[{engine}]"):
+            records = (
+                cls._load_epw_records_c(fp, field_dtypes)
+                if engine == "c"
+                else cls._load_epw_records((line.rstrip() for line in fp), field_dtypes)
+            )
+        return cls(**headers, records=records)
+
+    def _check_records(self, missing_as_nan: bool, validate: bool) -> Self:  # type: ignore[valid-type] # python/mypy#11666
+        if missing_as_nan:
+            with _stage("missing_as_nan"):
+                self.records = _missing_as_nan(self.records)
+        if validate and not (validation := self.validate()).valid:
+            field_name = next(
+                field_name
+                for field_name, num_invalid in validation.counts().items()
+                if num_invalid
+            )
+            row_idx = np.flatnonzero(validation.mask(field_name))[0].item()
+            raise ValueError(
+                f"invalid {field_name} at row {row_idx}: "
+                f"'{self.records[field_name].item(row_idx)}'."
+            )
+        return self
+
+    @classmethod
+    def read_header(cls, epw_file: AnyStrPath) -> dict[str, _Header]:
+        with _open_epw(epw_file) as fp:
+            return cls._load_epw_headers(line.rstrip() for line in fp)
+
+    @classmethod
+    def iter_records(
+        cls,
+        epw_file: AnyStrPath,
+        chunksize: int = 8760,
+        *,
+        engine: Literal["c", "python"] = "c",
+        columns: Iterable[str] | None = None,
+        dtypes: Literal["compact"] | AnyDTypes | None = None,
+        missing_as_nan: bool = False,
+    ) -> Iterator[rectable]:
+        cls._check_engine(engine)
+        field_dtypes = cls._select_dtypes(columns, dtypes)
+        if chunksize < 1:
+            raise ValueError(f"invalid chunksize: '{chunksize}'.")
+        with _open_epw(epw_file) as fp:
+            epw_iter = (line.rstrip() for line in fp)
+            deque(islice(epw_iter, len(cls.metafields)), maxlen=0)  # skip headers
+            chunks = (
+                cls._load_epw_records_c(fp, field_dtypes, chunksize=chunksize)
+                if engine == "c"
+                else (
+                    cls._load_epw_records(iter(epw_records), field_dtypes)
+                    for epw_records in iter(
+                        lambda: tuple(islice(epw_iter, chunksize)), ()
+                    )
+                )
+            )
+            chunks = _stage_iter(f"read_records[{engine}]", chunks)
+            yield from map(_missing_as_nan, chunks) if missing_as_nan else chunks
+
+    def to_epw(
+        self,
+        epw_file: AnyStrPath,
+        *,
+        float_format: str | Mapping[str, str] | None = None,
+        chunksize: int = 4096,
+    ) -> None:
+        if self.records.field_names != tuple(self.fields.keys()):
+            raise ValueError("cannot write an epw file with unloaded columns.")
+        if chunksize < 1:
+            raise ValueError(f"invalid chunksize: '{chunksize}'.")
+        with (
+            _open_epw(epw_file, "w", buffering=_WRITE_BUFFER_SIZE) as fp,
+            _stage("write_epw"),
+        ):
+            fp.writelines(
+                (
+                    self.location._to_epw_line() + "\n",  # type: ignore[attr-defined] # python/mypy#6063
+                    self.design_conditions._to_epw_line() + "\n",  # type: ignore[attr-defined] # python/mypy#6063
+                    self.typical_extreme_periods._to_epw_line() + "\n",  # type: ignore[attr-defined] # python/mypy#6063
+                    self.ground_temperatures._to_epw_line() + "\n",  # type: ignore[attr-defined] # python/mypy#6063
+                    self.holidays_daylight_saving._to_epw_line() + "\n",  # type: ignore[attr-defined] # python/mypy#6063
+                    self.comments_1._to_epw_line() + "\n",  # type: ignore[attr-defined] # python/mypy#6063
+                    self.comments_2._to_epw_line() + "\n",  # type: ignore[attr-defined] # python/mypy#6063
+                    self.data_periods._to_epw_line() + "\n",  # type: ignore[attr-defined] # python/mypy#6063
+                )
+            )
+            fp.writelines(
+                _stage_iter(
+                    "format_records", self._dump_epw_records(float_format, chunksize)
+                )
+            )
+
+    def update_epw(
+        self,
+        epw_file: AnyStrPath,
+        *,
+        float_format: str | Mapping[str, str] | None = None,
+    ) -> None:
+        # rewrites the epw file the records were loaded from, re-formatting only the
+        # dirty fields of the dirty rows and the headers that no longer match; all
+        # other lines are copied as they are, and every line keeps its line ending
+        float_formats = (
+            dict.fromkeys(self.fields.keys(), float_format)
+            if (float_format is None) or isinstance(float_format, str)
+            else float_format
+        )
+        field_idxs = {field_name: idx for idx, field_name in enumerate(self.fields)}
+        dirty_vals = {
+            field_idxs[field_name]: (
+                start,
+                self._dump_epw_field(
+                    self.records[field_name][start:stop],
+                    self.fields[field_name],
+                    float_formats.get(field_name),
+                ),
+            )
+            for field_name, (start, stop) in self.records.dirty.items()
+        }
+
+        epw_path = Path(epw_file)
+        fd, tmp_file = tempfile.mkstemp(  # same suffix, for compressed output
+            prefix=f".{epw_path.name}.",
+            suffix=f".tmp{epw_path.suffix}",
+            dir=epw_path.parent,
+        )
+        os.close(fd)
+        try:
+            with (
+                _open_epw(epw_file, newline="") as fp,
+                _open_epw(
+                    tmp_file, "w", buffering=_WRITE_BUFFER_SIZE, newline=""
+                ) as tmp_fp,
+                _stage("update_epw"),
+            ):
+                num_changed = 0
+                for header_name, header_cls in self.metafields.items():
+                    epw_line = next(fp, "")
+                    header_line = getattr(self, header_name)._to_epw_line()
+                    if header_cls._from_epw_line(epw_line.rstrip())._to_epw_line() == (
+                        header_line
+                    ):
+                        tmp_fp.write(epw_line)
+                    else:
+                        tmp_fp.write(header_line + _line_ending(epw_line, "\n"))
+                        num_changed += 1
+                num_rows = 0
+                for row_idx, epw_line in enumerate(fp):
+                    num_rows += 1
+                    epw_line_parts = None
+                    for field_idx, (start, field_vals) in dirty_vals.items():
+                        if start <= row_idx < start + len(field_vals):
+                            if epw_line_parts is None:
+                                epw_line_parts = epw_line.rstrip().split(",")
+                                epw_line_parts += [""] * (
+                                    len(self.fields) - len(epw_line_parts)
+                                )  # for bad epw
+                            epw_line_parts[field_idx] = field_vals[row_idx - start]
+                    if epw_line_parts is None:
+                        tmp_fp.write(epw_line)
+                    else:
+                        tmp_fp.write(",".join(epw_line_parts) + _line_ending(epw_line))
+                        num_changed += 1
+                _count("changed_lines", num_changed)
+            if num_rows != len(self.records):
+                raise ValueError(
+                    f"invalid epw file to update with {len(self.records)} records: '{epw_file}'."
+                )
+            if num_changed:
+                os.replace(tmp_file, epw_path)
+        finally:
+            Path(tmp_file).unlink(missing_ok=True)
+        self.records.dirty.clear()
+
+    def fingerprint(self) -> str:
+        # of the headers and the typed data, equal for equal content whatever the
+        # engine, nan included, e.g. for dedup; the data part is memoised
+        digest = hashlib.blake2b(
+            self.records._cached(
+                ("fingerprint",),
+                lambda: _fingerprint_records(self.records),
+                self.records.field_names,
             ),
-            ground_temperatures=_GroundTemperatures._from_epw_line(next(epw_iter)),  # type: ignore[attr-defined] # python/mypy#6063
-            holidays_daylight_saving=_HolidaysDaylightSaving._from_epw_line(  # type: ignore[attr-defined] # python/mypy#6063
-                next(epw_iter)
+            digest_size=16,
+        )
+        for header_name in self.metafields:
+            digest.update(f"\n{getattr(self, header_name)._to_epw_line()}".encode())
+        return digest.hexdigest()
+
+    def diff(self, other: "EPW", *, rtol: float = 0.0, atol: float = 0.0) -> EPWDiff:
+        # nan equal to nan, tolerances as in numpy.isclose for numeric fields
+        return _diff(
+            (
+                (
+                    header_name,
+                    getattr(self, header_name)._to_epw_line(),
+                    getattr(other, header_name)._to_epw_line(),
+                )
+                for header_name in self.metafields
             ),
-            comments_1=_Comments1._from_epw_line(next(epw_iter)),  # type: ignore[attr-defined] # python/mypy#6063
-            comments_2=_Comments2._from_epw_line(next(epw_iter)),  # type: ignore[attr-defined] # python/mypy#6063
-            data_periods=_DataPeriods._from_epw_line(next(epw_iter)),  # type: ignore[attr-defined] # python/mypy#6063
-            records=cls._load_epw_records(epw_iter),
+            self.records,
+            other.records,
+            rtol,
+            atol,
         )
 
-    def to_epw(self, epw_file: AnyStrPath) -> None:
-        with open(epw_file, "w") as fp:
-            fp.write(
-                "\n".join(
+    def validate(self) -> EPWValidation:
+        def _timed_validate() -> EPWValidation:
+            with _stage("validate"):
+                return _validate(self.records)
+
+        return self.records._cached(
+            ("validation",),
+            _timed_validate,
+            self.records.field_names,
+        )
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        # end of each record interval (epw is hour-ending), as datetime64[m]
+        records_per_hour = self.data_periods.number_of_records_per_hour  # type: ignore[attr-defined] # python/mypy#6063
+        return self.records._cached(
+            ("timestamps", records_per_hour),
+            lambda: self._load_timestamps(records_per_hour),
+            _TIME_FIELDS,
+        )
+
+    def solar_position(self) -> rectable:
+        # at the middle of each record interval, computed once per location and time
+        # grid, i.e. shared by all files of a station with the same timestamps
+        records_per_hour = self.data_periods.number_of_records_per_hour  # type: ignore[attr-defined] # python/mypy#6063
+        time_grid = self.records._cached(
+            ("time_grid", records_per_hour),
+            lambda: _TimeGrid(
+                self.timestamps - np.timedelta64(30 // records_per_hour, "m")
+            ),
+            _TIME_FIELDS,
+        )
+        return rectable(
+            _solar_position(
+                self.location.latitude,  # type: ignore[attr-defined] # python/mypy#6063
+                self.location.longitude,  # type: ignore[attr-defined] # python/mypy#6063
+                self.location.timezone,  # type: ignore[attr-defined] # python/mypy#6063
+                time_grid,
+            )
+        )
+
+    def morph(
+        self, transforms: Mapping[str, Callable[[np.ndarray], ArrayLike]]
+    ) -> Self:  # type: ignore[valid-type] # python/mypy#11666
+        # a variant sharing the headers, the untransformed columns and their memoised
+        # values; the transformed columns keep their dtype, e.g. float32 when compact
+        return replace(
+            self,
+            records=self.records.replace(
+                {
+                    field_name: self._astype_morphed(
+                        field_name, transform(self._morphed_column(field_name))
+                    )
+                    for field_name, transform in transforms.items()
+                }
+            ),
+        )
+
+    def morph_many(
+        self, transforms: Mapping[str, Callable[[np.ndarray], ArrayLike]]
+    ) -> list[Self]:  # type: ignore[valid-type] # python/mypy#11666
+        # each transform maps its column, shaped (1, records), to one row per variant,
+        # e.g. {"dry_bulb_temperature": lambda t: t + np.arange(1, 5)[:, np.newaxis]},
+        # so that it runs once for all variants; a single row is shared by all
+        blocks = {}
+        for field_name, transform in transforms.items():
+            column = self._morphed_column(field_name)
+            block = np.asarray(transform(column[np.newaxis, :]))
+            if (block.ndim != 2) or (block.shape[1] != len(column)):
+                raise ValueError(
+                    f"invalid transform shape of '{field_name}': '{block.shape}'."
+                )
+            blocks[field_name] = self._astype_morphed(field_name, block)
+        num_variants = max((len(block) for block in blocks.values()), default=1)
+        if any(len(block) not in (1, num_variants) for block in blocks.values()):
+            raise ValueError("transforms of unequal numbers of variants.")
+        return [
+            replace(
+                self,
+                records=self.records.replace(
+                    {
+                        field_name: block[0 if len(block) == 1 else variant_idx]
+                        for field_name, block in blocks.items()
+                    }
+                ),
+            )
+            for variant_idx in range(num_variants)
+        ]
+
+    def _morphed_column(self, field_name: str) -> np.ndarray:
+        if field_name not in self.records.columns:
+            raise ValueError(f"invalid loaded field name: '{field_name}'.")
+        return self.records[field_name]
+
+    def _astype_morphed(self, field_name: str, column: ArrayLike) -> np.ndarray:
+        dtype = self.records[field_name].dtype
+        column = np.asarray(column)
+        if dtype.kind == "O":
+            return column.astype(dtype, copy=False)
+        return _astype_column(field_name, column, dtype)
+
+    def between(self, start: AnyDatetime, end: AnyDatetime) -> Self:  # type: ignore[valid-type] # python/mypy#11666
+        # records whose interval lies in (start, end], sharing headers and columns
+        timestamps = self.timestamps
+        start_idx, end_idx = np.searchsorted(
+            timestamps,
+            (np.datetime64(start, "m"), np.datetime64(end, "m")),
+            side="right",
+        ).tolist()
+        return replace(self, records=self.records[start_idx:end_idx])
+
+    def period(self, period_name: str, *, year: int | None = None) -> Self:  # type: ignore[valid-type] # python/mypy#11666
+        # the records of a typical/extreme or data period, in every year of the records
+        # unless 'year' is given; a view if that is one slice of the records, else a
+        # copy, as periods of several years are joined and one across the year end of
+        # a single year wraps around to its first records
+        period_days = {
+            period[0]: period[2:4]  # name, (start day, end day)
+            for period in chain(
+                self.typical_extreme_periods.records,  # type: ignore[attr-defined] # python/mypy#6063
+                self.data_periods.records,  # type: ignore[attr-defined] # python/mypy#6063
+            )
+        }
+        if period_name not in period_days:
+            raise ValueError(f"invalid period name: '{period_name}'.")
+        if len(self.records) == 0:
+            return self
+
+        (start_month, start_day), (end_month, end_day) = (
+            map(int, day.split("/")) for day in period_days[period_name]
+        )
+        years = (  # of the start of each interval, i.e. hour 24 of 12/31 is in its year
+            np.unique(
+                (self.timestamps - np.timedelta64(1, "m")).astype("datetime64[Y]")
+            ).astype(int)
+            + 1970
+        ).tolist()
+        if (year is not None) and (year not in years):
+            raise ValueError(f"invalid year: '{year}'.")
+        across = (end_month, end_day) < (start_month, start_day)  # the year end
+        one_day = np.timedelta64(1, "D")
+        periods = []
+        for period_year in years if year is None else (year,):
+            start = np.datetime64(date(period_year, start_month, start_day), "m")
+            end = np.datetime64(date(period_year, end_month, end_day), "m") + one_day
+            if not across:
+                periods.append(self.between(start, end))
+            elif len(years) > 1:  # into the next year, clipped at the last record
+                periods.append(
+                    self.between(
+                        start,
+                        np.datetime64(date(period_year + 1, end_month, end_day), "m")
+                        + one_day,
+                    )
+                )
+            else:
+                periods.append(
+                    self.between(start, np.datetime64(date(period_year + 1, 1, 1), "m"))
+                )
+                periods.append(
+                    self.between(np.datetime64(date(period_year, 1, 1), "m"), end)
+                )
+        periods = [period for period in periods if len(period.records)]
+        if len(periods) <= 1:
+            return periods[0] if periods else replace(self, records=self.records[:0])
+        return replace(
+            self, records=_concat_records(period.records for period in periods)
+        )
+
+    def resample(
+        self,
+        freq: Literal["D", "M"],
+        fields: Iterable[str] | None = None,
+        how: Literal["mean", "min", "max", "sum"] = "mean",
+    ) -> rectable:
+        if freq not in _RESAMPLE_KEYS:
+            raise ValueError(f"invalid freq: '{freq}'.")
+        if how not in _RESAMPLE_UFUNCS:
+            raise ValueError(f"invalid how: '{how}'.")
+        field_names = tuple(
+            (
+                field_name
+                for field_name, field_type in self.fields.items()
+                if field_type is float
+            )
+            if fields is None
+            else fields
+        )
+        for field_name in field_names:
+            if self.fields.get(field_name, str) is str:
+                raise ValueError(f"invalid numeric field name: '{field_name}'.")
+
+        return self.records._cached(
+            ("resample", freq, field_names, how),
+            lambda: self._resample(
+                _RESAMPLE_KEYS[freq],
+                {field_name: self.records[field_name] for field_name in field_names},
+                how,
+            ),
+            _TIME_FIELDS + field_names,
+        )
+
+    def degree_days(
+        self, base: float = 18.0, freq: Literal["D", "M"] = "M"
+    ) -> rectable:
+        # daily mean dry bulb temperature method, summed per month for 'M'
+        if freq not in _RESAMPLE_KEYS:
+            raise ValueError(f"invalid freq: '{freq}'.")
+
+        def _degree_days() -> rectable:
+            daily_means = self.resample("D", ("dry_bulb_temperature",))
+            daily_degree_days = rectable(
+                {key_name: daily_means[key_name] for key_name in _RESAMPLE_KEYS["D"]}
+                | {
+                    "heating_degree_days": np.fmax(
+                        base - daily_means["dry_bulb_temperature"], 0.0
+                    ),
+                    "cooling_degree_days": np.fmax(
+                        daily_means["dry_bulb_temperature"] - base, 0.0
+                    ),
+                }
+            )
+            if freq == "D":
+                return daily_degree_days
+            return self._resample(
+                _RESAMPLE_KEYS[freq],
+                {
+                    field_name: daily_degree_days[field_name]
+                    for field_name in ("heating_degree_days", "cooling_degree_days")
+                },
+                "sum",
+                daily_degree_days,
+            )
+
+        return self.records._cached(
+            ("degree_days", base, freq),
+            _degree_days,
+            _TIME_FIELDS + ("dry_bulb_temperature",),
+        )
+
+    def _resample(
+        self,
+        key_names: tuple[str, ...],
+        columns: dict[str, np.ndarray],
+        how: str,
+        records: rectable | None = None,
+    ) -> rectable:
+        # vectorised group-by over consecutive runs of equal keys
+        records = self.records if records is None else records
+        if len(records) == 0:
+            return rectable(
+                {key_name: records[key_name] for key_name in key_names} | columns
+            )
+        key_changes = np.zeros(len(records), dtype=bool)
+        key_changes[0] = True
+        for key_name in key_names:
+            key_changes[1:] |= records[key_name][1:] != records[key_name][:-1]
+        starts = np.flatnonzero(key_changes)
+
+        resampled = {key_name: records[key_name][starts] for key_name in key_names}
+        for field_name, column in columns.items():
+            is_nan = np.isnan(column) if column.dtype.kind == "f" else None
+            if how in ("mean", "sum"):
+                sums = np.add.reduceat(
+                    column if is_nan is None else np.where(is_nan, 0, column),
+                    starts,
+                    dtype=np.int64 if is_nan is None else np.float64,  # e.g. of int8
+                )
+                if how == "sum":
+                    resampled[field_name] = sums
+                    continue
+                counts = np.add.reduceat(
+                    np.ones(len(column), dtype=np.int64) if is_nan is None else ~is_nan,
+                    starts,
+                    dtype=np.int64,
+                )
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    resampled[field_name] = sums / counts  # nan for empty groups
+            else:
+                resampled[field_name] = _RESAMPLE_UFUNCS[how].reduceat(column, starts)
+        return rectable(resampled)
+
+    def _load_derived_field(self, name: str) -> np.ndarray:
+        # computed once, until any of the (transitive) input columns is replaced
+        input_names, func = _PSYCHROMETRIC_FIELDS[name]
+        depends = _derived_depends(name)
+        if missing_names := set(depends) - self.records.columns.keys():
+            raise AttributeError(
+                f"{name} needs {min(missing_names)}, which is not loaded, "
+                f"see 'columns' when loading '{self.name}'."
+            )
+
+        def _derive() -> np.ndarray:
+            column = np.asarray(
+                func(*(getattr(self, input_name) for input_name in input_names)),
+                dtype=np.float64,
+            )
+            column.flags.writeable = False  # shared by all accesses
+            return column
+
+        return self.records._cached(("derived", name), _derive, depends)
+
+    def _load_timestamps(self, records_per_hour: int) -> np.ndarray:
+        year, month, day, hour, minute = (
+            self.records[field_name].astype(np.int64) for field_name in _TIME_FIELDS
+        )
+        minutes = (hour - 1) * 60 + (60 if records_per_hour == 1 else minute)
+        days = np.asarray(day - 1, dtype="timedelta64[D]")
+        year_ends = np.cumsum(np.diff(month, prepend=month[:1]) < 0)
+        if len(year) and not np.array_equal(year - year[0], year_ends):
+            # typical years mix source years in any order, hence placed on one calendar
+            leap_day = np.any((month == 2) & (day == 29))
+            ref_year = next(
+                y for y in count(year[0]) if (not leap_day) or calendar.isleap(y)
+            )
+            year = ref_year + year_ends
+        return (self._load_dates(year, month) + days).astype(
+            "datetime64[m]"
+        ) + minutes.astype("timedelta64[m]")
+
+    @staticmethod
+    def _load_dates(year: np.ndarray, month: np.ndarray) -> np.ndarray:
+        return (
+            (year - 1970).astype("datetime64[Y]").astype("datetime64[M]")
+            + (month - 1).astype("timedelta64[M]")
+        ).astype("datetime64[D]")
+
+    @classmethod
+    def from_epw_many(
+        cls,
+        epw_files: Iterable[AnyStrPath],
+        *,
+        max_workers: int | None = None,
+        chunksize: int = 1,
+        ordered: bool = True,
+        engine: Literal["c", "python"] = "c",
+        columns: Iterable[str] | None = None,
+        dtypes: Literal["compact"] | AnyDTypes | None = None,
+        missing_as_nan: bool = False,
+        validate: bool = False,
+    ) -> Iterator[tuple[AnyStrPath, Self | Exception]]:  # type: ignore[valid-type] # python/mypy#11666
+        cls._check_engine(engine)
+        field_dtypes = cls._select_dtypes(columns, dtypes)
+        load_kwargs = {
+            "engine": engine,
+            "columns": tuple(field_dtypes.keys()),
+            "dtypes": field_dtypes,
+            "missing_as_nan": missing_as_nan,
+            "validate": validate,
+        }
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"invalid max_workers: '{max_workers}'.")
+        if chunksize < 1:
+            raise ValueError(f"invalid chunksize: '{chunksize}'.")
+        # NOTE: arguments are checked above on call, while files are loaded, and
+        # missing ones reported, per file on iteration
+        return _iter_epw_batches(
+            cls, iter(epw_files), max_workers, chunksize, ordered, load_kwargs
+        )
+
+    @classmethod
+    async def afrom_epw(
+        cls,
+        epw_file: AnyStrPath,
+        *,
+        executor: Executor | None = None,
+        semaphore: "asyncio.Semaphore | None" = None,
+        **kwargs: Any,
+    ) -> Self:  # type: ignore[valid-type] # python/mypy#11666
+        # reading and parsing both run in the executor, the loop's default if None
+        return await _run_in_executor(
+            partial(cls.from_epw, epw_file, **kwargs), executor, semaphore
+        )
+
+    async def ato_epw(
+        self,
+        epw_file: AnyStrPath,
+        *,
+        executor: Executor | None = None,
+        semaphore: "asyncio.Semaphore | None" = None,
+        **kwargs: Any,
+    ) -> None:
+        # written to a temporary file next to epw_file, which replaces it on success
+        # only, so that an error or a cancellation never leaves a partial file
+        epw_path = Path(epw_file)
+        fd, tmp_file = tempfile.mkstemp(  # same suffix, for compressed output
+            prefix=f".{epw_path.name}.",
+            suffix=f".tmp{epw_path.suffix}",
+            dir=epw_path.parent,
+        )
+        os.close(fd)
+        remove_tmp_file = partial(Path(tmp_file).unlink, missing_ok=True)
+        await _run_in_executor(
+            partial(self.to_epw, tmp_file, **kwargs),
+            executor,
+            semaphore,
+            on_abort=remove_tmp_file,
+        )
+        try:
+            os.replace(tmp_file, epw_path)
+        except OSError:
+            remove_tmp_file()
+            raise
+
+    @staticmethod
+    def _check_engine(engine: str) -> None:
+        if engine not in ("c", "python"):
+            raise ValueError(f"invalid engine: '{engine}'.")
+
+    @classmethod
+    def _select_dtypes(
+        cls,
+        columns: Iterable[str] | None,
+        dtypes: Literal["compact"] | AnyDTypes | None,
+    ) -> dict[str, np.dtype]:
+        # numpy dtypes of the selected fields, in the schema order
+        columns = cls.fields.keys() if columns is None else frozenset(columns)
+        if isinstance(dtypes, str):
+            if dtypes != "compact":
+                raise ValueError(f"invalid dtypes: '{dtypes}'.")
+            dtypes = _EPW_COMPACT_DTYPES
+        dtypes = {} if dtypes is None else dtypes
+        if invalid_names := (columns | dtypes.keys()) - cls.fields.keys():
+            raise ValueError(f"invalid field name: '{min(invalid_names)}'.")
+
+        field_dtypes = {}
+        for field_name, field_type in cls.fields.items():
+            if field_name not in columns:
+                continue
+            dtype = np.dtype(dtypes.get(field_name, _NUMPY_DTYPES[field_type]))
+            if dtype.kind not in {int: "iu", float: "f", str: "O"}[field_type]:
+                raise ValueError(f"invalid dtype of '{field_name}': '{dtype}'.")
+            field_dtypes[field_name] = dtype
+        return field_dtypes
+
+    @staticmethod
+    def _astype_records(
+        records: rectable, field_dtypes: dict[str, np.dtype]
+    ) -> rectable:
+        return rectable(
+            {
+                field_name: _astype_column(field_name, records[field_name], dtype)
+                for field_name, dtype in field_dtypes.items()
+            }
+        )
+
+    @classmethod
+    def _load_epw_headers(cls, epw_lines: Iterator[str]) -> dict[str, _Header]:
+        return {
+            header_name: header_cls._from_epw_line(next(epw_lines))
+            for header_name, header_cls in cls.metafields.items()
+        }
+
+    @classmethod
+    def _load_epw_records(
+        cls,
+        epw_records: Iterator[str],
+        field_dtypes: dict[str, np.dtype] | None = None,
+    ) -> rectable:
+        field_dtypes = (
+            cls._select_dtypes(None, None) if field_dtypes is None else field_dtypes
+        )
+        field_idxs = [
+            field_idx
+            for field_idx, field_name in enumerate(cls.fields)
+            if field_name in field_dtypes
+        ]
+        # the fields after the last selected one are never split, and the other
+        # unselected ones are dropped per record, before the columns are built
+        num_fields = field_idxs[-1] + 1 if field_idxs else 0
+        select_fields = (
+            itemgetter(*field_idxs)
+            if len(field_idxs) > 1
+            else lambda data: tuple(data[field_idx] for field_idx in field_idxs)
+        )
+        if _profiling():
+            epw_records = _count_padded(epw_records, len(cls.fields))
+        records_data = (epw_record.split(",", num_fields) for epw_record in epw_records)
+        with _stage("split_records"):
+            field_vals_iter = zip(
+                *(
+                    select_fields(data + [""] * (num_fields - len(data)))  # bad epw
+                    for data in records_data
+                ),
+                strict=True,
+            )
+        with _stage("convert_fields"):
+            records = rectable(
+                {
+                    field_name: _astype_column(
+                        field_name,
+                        np.fromiter(
+                            cls._load_epw_field(cls.fields[field_name], field_vals),
+                            dtype=_NUMPY_DTYPES[cls.fields[field_name]],
+                            count=len(field_vals),
+                        ),
+                        dtype,
+                    )
+                    for (field_name, dtype), field_vals in zip(
+                        field_dtypes.items(),
+                        chain(field_vals_iter, repeat(())),  # for empty data
+                    )
+                }
+            )
+        _count("rows", len(records))
+        _count("cells", len(records) * len(field_dtypes))
+        return records
+
+    @overload
+    @classmethod
+    def _load_epw_records_c(
+        cls, fp: TextIO, field_dtypes: dict[str, np.dtype], chunksize: None = None
+    ) -> rectable: ...
+    @overload
+    @classmethod
+    def _load_epw_records_c(
+        cls, fp: TextIO, field_dtypes: dict[str, np.dtype], chunksize: int
+    ) -> Iterator[rectable]: ...
+    @classmethod
+    def _load_epw_records_c(cls, fp, field_dtypes, chunksize=None):
+        # NOTE: the c parser checks 'usecols' against the widest row of each block it
+        # reads, hence a block of short rows only is read again at full width, padded
+        if chunksize:
+            return (
+                cls._load_epw_records_c(StringIO("".join(epw_lines)), field_dtypes)
+                for epw_lines in iter(lambda: tuple(islice(fp, chunksize)), ())
+            )
+        pd = _import_pandas()
+        read_csv = partial(
+            pd.read_csv,
+            header=None,
+            names=tuple(cls.fields.keys()),
+            keep_default_na=False,
+            na_values={
+                field_name: ("",)
+                for field_name in field_dtypes
+                if cls.fields[field_name] is float
+            },
+            float_precision="round_trip",  # identical to float()
+            quoting=csv.QUOTE_NONE,  # quotes are kept, as by the python engine
+            engine="c",
+        )
+        dtype = {
+            field_name: _NUMPY_DTYPES[cls.fields[field_name]]
+            for field_name in field_dtypes
+        }
+        data_start = fp.tell()
+        try:
+            records_df = read_csv(
+                fp,
+                usecols=[  # unselected fields are never converted nor stored
+                    field_idx
+                    for field_idx, field_name in enumerate(cls.fields)
+                    if field_name in field_dtypes
+                ],
+                dtype=dtype,
+            )
+        except pd.errors.EmptyDataError:
+            records_df = pd.DataFrame()
+        except pd.errors.ParserError as e:
+            if "Too many columns specified" not in str(e):
+                raise
+            fp.seek(data_start)
+            records_df = read_csv(
+                fp, dtype=dict.fromkeys(cls.fields.keys(), object) | dtype
+            )
+        return cls._load_epw_records_df(records_df, field_dtypes)
+
+    @classmethod
+    def _load_epw_records_df(
+        cls, records_df: "pd.DataFrame", field_dtypes: dict[str, np.dtype]
+    ) -> rectable:
+        if records_df.empty:
+            return cls._load_epw_records(iter(()), field_dtypes)
+        _count("rows", len(records_df))
+        _count("cells", len(records_df) * len(field_dtypes))
+        return rectable(
+            {
+                field_name: _astype_column(
+                    field_name,
                     (
-                        self.location._to_epw_line(),  # type: ignore[attr-defined] # python/mypy#6063
-                        self.design_conditions._to_epw_line(),  # type: ignore[attr-defined] # python/mypy#6063
-                        self.typical_extreme_periods._to_epw_line(),  # type: ignore[attr-defined] # python/mypy#6063
-                        self.ground_temperatures._to_epw_line(),  # type: ignore[attr-defined] # python/mypy#6063
-                        self.holidays_daylight_saving._to_epw_line(),  # type: ignore[attr-defined] # python/mypy#6063
-                        self.comments_1._to_epw_line(),  # type: ignore[attr-defined] # python/mypy#6063
-                        self.comments_2._to_epw_line(),  # type: ignore[attr-defined] # python/mypy#6063
-                        self.data_periods._to_epw_line(),  # type: ignore[attr-defined] # python/mypy#6063
-                        *self._dump_epw_records(),
+                        records_df[field_name].fillna("")  # for bad epw
+                        if dtype.kind == "O"
+                        else records_df[field_name]
+                    ).to_numpy(),
+                    dtype,
+                )
+                for field_name, dtype in field_dtypes.items()
+            }
+        )
+
+    def _dump_epw_records(
+        self,
+        float_format: str | Mapping[str, str] | None = None,
+        chunksize: int = 4096,
+    ) -> Iterator[str]:
+        # formats column-wise per chunk, yielding one newline-terminated block per chunk
+        float_formats = (
+            dict.fromkeys(self.fields.keys(), float_format)
+            if (float_format is None) or isinstance(float_format, str)
+            else float_format
+        )
+        for start in range(0, len(self.records), chunksize):
+            chunk = self.records[start : start + chunksize]
+            yield (
+                "\n".join(
+                    map(
+                        ",".join,
+                        zip(
+                            *(
+                                self._dump_epw_field(
+                                    chunk[field_name],
+                                    field_type,
+                                    float_formats.get(field_name),
+                                )
+                                for field_name, field_type in self.fields.items()
+                            ),
+                            strict=True,
+                        ),
                     )
                 )
                 + "\n"
             )
 
-    @classmethod
-    def _load_epw_records(cls, epw_records: Iterator[str]) -> AnyRecords:
-        return cls._load_epw_records_generic(
-            iter(
-                (data := tuple(epw_record.split(",")))
-                + ("",) * (len(cls.fields) - len(data))  # for bad epw
+    @staticmethod
+    def _dump_epw_field(
+        column: np.ndarray, field_type: type, float_format: str | None
+    ) -> list[str]:
+        if field_type is str:
+            return column.tolist()
+        # each distinct value is formatted once, as epw columns repeat few values;
+        # floats by their bits, so that -0.0 and 0.0 stay apart
+        uniques, inverse = np.unique(
+            column.view(f"i{column.itemsize}") if field_type is float else column,
+            return_inverse=True,
+        )
+        uniques = uniques.view(column.dtype)
+        if (float_format is None) and (column.dtype.itemsize < 8):
+            # NOTE: numpy's own str conversion, the shortest repr of e.g. float32
+            field_vals = uniques.astype(str).tolist()
+        else:
+            field_vals = list(
+                map(
+                    str
+                    if (float_format is None) or (field_type is not float)
+                    else float_format.__mod__,
+                    uniques.tolist(),  # NOTE: faster than numpy's own str conversion
+                )
             )
-            for epw_record in epw_records
+        if field_type is float:
+            for idx in np.flatnonzero(np.isnan(uniques)).tolist():
+                field_vals[idx] = ""  # nan as empty
+        return np.array(field_vals, dtype=object)[inverse].tolist()
+
+
+def _count_padded(epw_records: Iterator[str], num_fields: int) -> Iterator[str]:
+    # rows of a bad epw short of fields, only wrapped in when profiling
+    num_padded = 0
+    for epw_record in epw_records:
+        num_padded += epw_record.count(",") + 1 < num_fields
+        yield epw_record
+    _count("padded_rows", num_padded)
+
+
+def _concat_records(tables: Iterable[rectable]) -> rectable:
+    # copies, in order, of tables with the same columns
+    tables = tuple(tables)
+    return rectable(
+        {
+            field_name: np.concatenate([table[field_name] for table in tables])
+            for field_name in tables[0].field_names
+        }
+    )
+
+
+def _line_ending(epw_line: str, default: str = "") -> str:
+    # as read without newline translation, the last line may have none
+    return epw_line[len(epw_line.rstrip("\r\n")) :] or default
+
+
+def _derived_depends(name: str) -> tuple[str, ...]:
+    # the schema fields a derived field is computed from, in the end
+    if name not in _PSYCHROMETRIC_FIELDS:
+        return (name,)
+    return tuple(
+        dict.fromkeys(
+            chain.from_iterable(map(_derived_depends, _PSYCHROMETRIC_FIELDS[name][0]))
         )
+    )
+
+
+def _load_epw_chunk(
+    epw_cls: type[EPW],
+    epw_file: AnyStrPath,
+    start: int,
+    end: int,
+    engine: str,
+    field_dtypes: dict[str, np.dtype],
+) -> rectable:
+    # runs in the worker processes of EPW._load_epw_parallel, decoded as by open()
+    with open(epw_file, "rb") as fp:
+        fp.seek(start)
+        fp = TextIOWrapper(BytesIO(fp.read(end - start)))
+    if engine == "c":
+        return epw_cls._load_epw_records_c(fp, field_dtypes)
+    return epw_cls._load_epw_records((line.rstrip() for line in fp), field_dtypes)
+
+
+def _iter_epw_batches(
+    epw_cls: type[EPW],
+    epw_files: Iterator[AnyStrPath],
+    max_workers: int | None,
+    chunksize: int,
+    ordered: bool,
+    load_kwargs: dict,
+) -> Iterator[tuple[AnyStrPath, EPW | Exception]]:
+    batches = iter(lambda: tuple(islice(epw_files, chunksize)), ())
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        if ordered:
+            results = executor.map(
+                _load_epw_batch, repeat(epw_cls), batches, repeat(load_kwargs)
+            )
+        else:
+            results = as_completed(
+                executor.submit(_load_epw_batch, epw_cls, batch, load_kwargs)
+                for batch in batches
+            )
+            results = (future.result() for future in results)
+        for batch_results in results:
+            yield from batch_results
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _load_epw_batch(
+    epw_cls: type[EPW], epw_files: tuple[AnyStrPath, ...], load_kwargs: dict
+) -> list[tuple[AnyStrPath, EPW | Exception]]:
+    # runs in the worker processes of EPW.from_epw_many, errors are returned per file
+    batch_results: list[tuple[AnyStrPath, EPW | Exception]] = []
+    for epw_file in epw_files:
+        try:
+            batch_results.append((epw_file, epw_cls.from_epw(epw_file, **load_kwargs)))  # type: ignore[arg-type]
+        except Exception as e:
+            batch_results.append((epw_file, e))
+    return batch_results
+
+
+async def _run_in_executor(
+    func: Callable[[], T],
+    executor: Executor | None,
+    semaphore: "asyncio.Semaphore | None",
+    on_abort: Callable[[], object] = lambda: None,
+) -> T:
+    # NOTE: a running func cannot be interrupted, so on cancellation it is left to
+    # finish while holding the semaphore, and on_abort runs once it has finished
+    import asyncio  # on demand, only the async api needs it
+
+    loop = asyncio.get_running_loop()
+    if semaphore is None:
+        semaphore = _async_semaphores.setdefault(
+            loop, asyncio.Semaphore(_ASYNC_MAX_CONCURRENCY)
+        )
+    await semaphore.acquire()
+    try:
+        future = loop.run_in_executor(executor, func)
+    except BaseException:
+        semaphore.release()
+        on_abort()
+        raise
+
+    cancelled = False
+
+    def _done(future: asyncio.Future) -> None:
+        semaphore.release()
+        if cancelled or future.cancelled() or (future.exception() is not None):
+            on_abort()
 
-    def _dump_epw_records(self) -> Iterator[str]:
-        return self._dump_epw_records_generic()
+    future.add_done_callback(_done)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        cancelled = True
+        if future.done():  # NOTE: on_abort is idempotent, _done may have run
+            on_abort()
+        raise